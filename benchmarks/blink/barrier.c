@@ -21,7 +21,7 @@ int main(int argc, char** argv){
     signal(SIGUSR1,sig_handler); //or SIGUSR1 here
 
     /*default values*/
-    int master_rank=0;
+    master_rank=0; /*global of common.h: write_results and the timestamps use it too*/
     bool master_rand=false;
     
     int rand_seed=1;
@@ -74,6 +74,8 @@ int main(int argc, char** argv){
         }else if(strcmp(argv[i],"-maxsamples")==0){
             ++i;
             max_samples=atoi(argv[i]);
+        }else if(parse_common_arg(argc,argv,&i)){
+            /*option shared by all the benchmarks, see common.h*/
         }else{
             if(my_rank==master_rank){
                 fprintf(stderr, "Unknown argument: %s\n", argv[i]);
@@ -97,12 +99,15 @@ int main(int argc, char** argv){
     
     /*allocate buffers*/
     durations=(double *)malloc_align(sizeof(double)*max_samples);
+    alloc_timestamps(); /*only with -timestamps*/
     
     if(durations==NULL){
         fprintf(stderr,"Failed to allocate a buffer on rank %d\n",my_rank);
         exit(-1);
     }
 
+    wait_start_gate(); /*only with -gate*/
+
     /*print basic info to stdout*/
     if(my_rank==master_rank){
         if(endless){
@@ -123,13 +128,14 @@ int main(int argc, char** argv){
 
     MPI_Barrier(MPI_COMM_WORLD);
     do{
-        for(k=0;k<max_iters+warm_up_iters;k++){
+        for(k=0;k<max_iters+warm_up_iters && !stopping;k++){
             if(burst_length_rand){ /*randomized burst length*/
                 burst_length=rand_expo(burst_length_mean);
             }
             burst_start_time=MPI_Wtime();
             do{
-                MPI_Barrier(MPI_COMM_WORLD);
+                if(sync_stop()) break; /*barrier, stops all the ranks together after SIGUSR1*/
+                record_timestamp();
                 measure_start_time=MPI_Wtime();
                 for(i=0;i<measure_granularity;i++){
                     MPI_Barrier(MPI_COMM_WORLD);
@@ -150,7 +156,7 @@ int main(int argc, char** argv){
                 dsleep(burst_pause);
             }
         }
-    }while(endless);
+    }while(endless && !stopping);
 
     /*write results to file*/
     MPI_Barrier(MPI_COMM_WORLD);
@@ -158,6 +164,7 @@ int main(int argc, char** argv){
     
     /*free allocated buffers*/
     free(durations);
+    free(timestamps);
     
     /*exit MPI library*/
     MPI_Finalize();
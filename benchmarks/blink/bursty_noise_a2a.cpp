@@ -95,6 +95,13 @@ int main(int argc, char** argv) {
         std::cerr << "Not enough arguments. Usage: ./bursty_noise_a2a <burst_pause> <burst_length>" << std::endl;
         return 1;
     }
+    /*options shared with the other benchmarks (e.g. -gate) follow the positional arguments*/
+    for(int i = 3; i < argc; i++){
+        if(!parse_common_arg(argc, argv, &i)){
+            std::cerr << "Unknown argument: " << argv[i] << std::endl;
+            return 1;
+        }
+    }
 
 
     bool burst_pause_rand = false;
@@ -104,6 +111,7 @@ int main(int argc, char** argv) {
     double burst_pause_mean=burst_pause;
     int burst_cont=0;
 
+    wait_start_gate(); /*only with -gate*/
     while (1) {
         burst_start_time=MPI_Wtime();
         do {
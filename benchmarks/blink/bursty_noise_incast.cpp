@@ -44,6 +44,13 @@ int main(int argc, char** argv) {
         std::cerr << "Not enough arguments. Usage: ./bursty_noise_a2a <burst_pause> <burst_length>" << std::endl;
         return 1;
     }
+    /*options shared with the other benchmarks (e.g. -gate) follow the positional arguments*/
+    for(int i = 3; i < argc; i++){
+        if(!parse_common_arg(argc, argv, &i)){
+            std::cerr << "Unknown argument: " << argv[i] << std::endl;
+            return 1;
+        }
+    }
 
 
     bool burst_pause_rand = false;
@@ -53,6 +60,7 @@ int main(int argc, char** argv) {
     double burst_pause_mean=burst_pause;
     int burst_cont=0;
 
+    wait_start_gate(); /*only with -gate*/
     while (1) {
         std::vector<MPI_Request> requests;
         burst_start_time=MPI_Wtime();
@@ -21,7 +21,7 @@ int main(int argc, char** argv){
     signal(SIGUSR1,sig_handler); //or SIGUSR1 here
 
     /*default values*/
-    int master_rank=0;
+    master_rank=0; /*global of common.h: write_results and the timestamps use it too*/
     bool master_rand=false;
     
     int rand_seed=1;
@@ -50,7 +50,7 @@ int main(int argc, char** argv){
             master_rand=true;
         }else if(strcmp(argv[i],"-msgsize")==0){
             ++i;
-            msg_size=atoi(argv[i]);
+            msg_size=parse_msg_sizes(argv[i]); /*largest size of the sweep*/
         }else if(strcmp(argv[i],"-endl")==0){
             endless=true;
         }else if(strcmp(argv[i],"-iter")==0){
@@ -78,6 +78,8 @@ int main(int argc, char** argv){
         }else if(strcmp(argv[i],"-maxsamples")==0){
             ++i;
             max_samples=atoi(argv[i]);
+        }else if(parse_common_arg(argc,argv,&i)){
+            /*option shared by all the benchmarks, see common.h*/
         }else{
             if(my_rank==master_rank){
                 fprintf(stderr, "Unknown argument: %s\n", argv[i]);
@@ -104,6 +106,7 @@ int main(int argc, char** argv){
     send_buf=(unsigned char*)malloc_align(send_buf_size);
     recv_buf=(unsigned char*)malloc_align(recv_buf_size);
     durations=(double *)malloc_align(sizeof(double)*max_samples);
+    alloc_timestamps(); /*only with -timestamps*/
     
     if(send_buf==NULL || recv_buf==NULL || durations==NULL){
         fprintf(stderr,"Failed to allocate a buffer on rank %d\n",my_rank);
@@ -115,107 +118,115 @@ int main(int argc, char** argv){
         send_buf[i]='a';
     }
     
-    /*print basic info to stdout*/
-    if(my_rank==master_rank){
-        if(endless){
-            printf("All-to-all with %d processes, msg-size: %d, test iterations: endless.\n"
-                    ,w_size,msg_size);
-        }else{
-            printf("All-to-all with %d processes, msg-size: %d, test iterations: %d.\n"
-                    ,w_size,msg_size,max_iters);
-        }
-    }
-    /*measured iterations*/
-    double burst_start_time;
-    double measure_start_time;
+    /*measure each message size of the sweep, buffers are sized for the largest one*/
     double burst_length_mean=burst_length;
     double burst_pause_mean=burst_pause;
-    bool burst_cont=false;
-    curr_iters=0;
-    
-    //-----------------
-    char *path_temp;
-    time_t t = time(NULL);
-    struct tm *tm = localtime(&t);
-    char s[64];
-    strftime(s, sizeof(s), "%c", tm);
-    FILE *fd_temp=fopen(s,"w");
-    if(my_rank==master_rank){ 
-                    struct timeval time_now;
-                    gettimeofday(&time_now, NULL);
-                    struct tm *time_str_tm;
-                    time_str_tm = gmtime(&time_now.tv_sec);
-                    if(endless){
-                        fprintf(fd_temp, "endless, %i B, %i iter, %i grty\n",msg_size,max_iters,measure_granularity);
-                    }else{
-                        fprintf(fd_temp, "limited, %i B, %i iter, %i grty\n",msg_size,max_iters,measure_granularity);
-                    }
-                    fprintf(fd_temp, "%02i:%02i:%02i:%06li\n---------------\n"
-                       , time_str_tm->tm_hour
-                       , time_str_tm->tm_min
-                       , time_str_tm->tm_sec
-                       , time_now.tv_usec);
-                    fflush(fd_temp);
-    }
-    //-----------------
-
-    MPI_Barrier(MPI_COMM_WORLD);
-    do{
-        for(k=0;k<max_iters+warm_up_iters;k++){
-            if(burst_length_rand){ /*randomized burst length*/
-                burst_length=rand_expo(burst_length_mean);
+    int size_idx;
+    wait_start_gate(); /*only with -gate*/
+    for(size_idx=0;size_idx<sweep_length() && !stopping;size_idx++){
+        msg_size=sweep_msg_size(size_idx,msg_size);
+        /*print basic info to stdout*/
+        if(my_rank==master_rank){
+            if(endless){
+                printf("All-to-all with %d processes, msg-size: %d, test iterations: endless.\n"
+                        ,w_size,msg_size);
+            }else{
+                printf("All-to-all with %d processes, msg-size: %d, test iterations: %d.\n"
+                        ,w_size,msg_size,max_iters);
             }
-            burst_start_time=MPI_Wtime();
-            do{
-                MPI_Barrier(MPI_COMM_WORLD);
-                measure_start_time=MPI_Wtime();
-                for(i=0;i<measure_granularity;i++){
-                    MPI_Alltoall(send_buf,msg_size,MPI_BYTE,recv_buf,msg_size,MPI_BYTE,MPI_COMM_WORLD);
-                }
-                durations[curr_iters%max_samples]=MPI_Wtime()-measure_start_time; /*write result to buffer (lru space)*/
-                curr_iters++;
-                //-----------------
-                if(my_rank==master_rank){ 
-                    struct timeval time_now;
-                    gettimeofday(&time_now, NULL);
-                    struct tm *time_str_tm;
-                    time_str_tm = gmtime(&time_now.tv_sec);
-                    fprintf(fd_temp, "%02i:%02i:%02i:%06li | %i | %i\n"
-                       , time_str_tm->tm_hour
-                       , time_str_tm->tm_min
-                       , time_str_tm->tm_sec
-                       , time_now.tv_usec
-                       , w_size
-                       , curr_iters);
-                    fflush(fd_temp);
+        }
+        /*measured iterations*/
+        double burst_start_time;
+        double measure_start_time;
+        bool burst_cont=false;
+        curr_iters=0;
+    
+        //-----------------
+        char *path_temp;
+        time_t t = time(NULL);
+        struct tm *tm = localtime(&t);
+        char s[64];
+        strftime(s, sizeof(s), "%c", tm);
+        FILE *fd_temp=fopen(s,"w");
+        if(my_rank==master_rank){ 
+                        struct timeval time_now;
+                        gettimeofday(&time_now, NULL);
+                        struct tm *time_str_tm;
+                        time_str_tm = gmtime(&time_now.tv_sec);
+                        if(endless){
+                            fprintf(fd_temp, "endless, %i B, %i iter, %i grty\n",msg_size,max_iters,measure_granularity);
+                        }else{
+                            fprintf(fd_temp, "limited, %i B, %i iter, %i grty\n",msg_size,max_iters,measure_granularity);
+                        }
+                        fprintf(fd_temp, "%02i:%02i:%02i:%06li\n---------------\n"
+                           , time_str_tm->tm_hour
+                           , time_str_tm->tm_min
+                           , time_str_tm->tm_sec
+                           , time_now.tv_usec);
+                        fflush(fd_temp);
+        }
+        //-----------------
+
+        MPI_Barrier(MPI_COMM_WORLD);
+        do{
+            for(k=0;k<max_iters+warm_up_iters && !stopping;k++){
+                if(burst_length_rand){ /*randomized burst length*/
+                    burst_length=rand_expo(burst_length_mean);
                 }
-                //-----------------
-                if(burst_length!=0){ /*bcast needed for synch if bursts timed*/
-                    if(my_rank==master_rank){ /*master decides if burst should be continued*/
-                        burst_cont=((MPI_Wtime()-burst_start_time)<burst_length);
+                burst_start_time=MPI_Wtime();
+                do{
+                    if(sync_stop()) break; /*barrier, stops all the ranks together after SIGUSR1*/
+                    record_timestamp();
+                    measure_start_time=MPI_Wtime();
+                    for(i=0;i<measure_granularity;i++){
+                        MPI_Alltoall(send_buf,msg_size,MPI_BYTE,recv_buf,msg_size,MPI_BYTE,MPI_COMM_WORLD);
                     }
-                    MPI_Bcast(&burst_cont,1,MPI_INT,master_rank,MPI_COMM_WORLD); /*bcast the masters decision*/
-                }
-            }while(burst_cont);
-            if(burst_pause!=0){
-                if(burst_pause_rand){ /*randomized break length*/
-                    burst_pause=rand_expo(burst_pause_mean);
+                    durations[curr_iters%max_samples]=MPI_Wtime()-measure_start_time; /*write result to buffer (lru space)*/
+                    curr_iters++;
+                    //-----------------
+                    if(my_rank==master_rank){ 
+                        struct timeval time_now;
+                        gettimeofday(&time_now, NULL);
+                        struct tm *time_str_tm;
+                        time_str_tm = gmtime(&time_now.tv_sec);
+                        fprintf(fd_temp, "%02i:%02i:%02i:%06li | %i | %i\n"
+                           , time_str_tm->tm_hour
+                           , time_str_tm->tm_min
+                           , time_str_tm->tm_sec
+                           , time_now.tv_usec
+                           , w_size
+                           , curr_iters);
+                        fflush(fd_temp);
+                    }
+                    //-----------------
+                    if(burst_length!=0){ /*bcast needed for synch if bursts timed*/
+                        if(my_rank==master_rank){ /*master decides if burst should be continued*/
+                            burst_cont=((MPI_Wtime()-burst_start_time)<burst_length);
+                        }
+                        MPI_Bcast(&burst_cont,1,MPI_INT,master_rank,MPI_COMM_WORLD); /*bcast the masters decision*/
+                    }
+                }while(burst_cont);
+                if(burst_pause!=0){
+                    if(burst_pause_rand){ /*randomized break length*/
+                        burst_pause=rand_expo(burst_pause_mean);
+                    }
+                    dsleep(burst_pause);
                 }
-                dsleep(burst_pause);
             }
-        }
-    }while(endless);
+        }while(endless && !stopping);
 
-    /*write results to file*/
-    MPI_Barrier(MPI_COMM_WORLD);
-    write_results();
+        /*write results to file*/
+        MPI_Barrier(MPI_COMM_WORLD);
+        write_results();
     
-    //-----------------
-    fclose(fd_temp);
-    //-----------------
+        //-----------------
+        fclose(fd_temp);
+        //-----------------
+    }
     
     /*free allocated buffers*/
     free(durations);
+    free(timestamps);
     free(send_buf);
     free(recv_buf);
     
@@ -8,6 +8,10 @@
 #include <signal.h>
 #include <stdbool.h>
 #include <sched.h>
+#include <limits.h>
+#include <stdint.h>
+#include <netdb.h>
+#include <sys/socket.h>
 
 /*draw a exponentially distributed number with expectation=mean*/
 static double rand_expo(double mean)
@@ -37,6 +41,59 @@ int compare_doubles(const void *p1, const void *p2)
         return 0;
 }
 
+/*k-th smallest value of a[0..n-1] (quickselect, O(n) on average). Reorders a so that
+  a[0..k-1] <= a[k] <= a[k+1..n-1]*/
+static double select_kth(double *a, int n, int k)
+{
+    int lo = 0, hi = n - 1;
+    int i, j;
+    double pivot, t;
+    while (lo < hi)
+    {
+        pivot = a[lo + (hi - lo) / 2];
+        i = lo;
+        j = hi;
+        while (i <= j)
+        {
+            while (a[i] < pivot)
+                i++;
+            while (a[j] > pivot)
+                j--;
+            if (i <= j)
+            {
+                t = a[i];
+                a[i] = a[j];
+                a[j] = t;
+                i++;
+                j--;
+            }
+        }
+        if (k <= j)
+            hi = j;
+        else if (k >= i)
+            lo = i;
+        else
+            break;
+    }
+    return a[k];
+}
+
+/*bound on the values gathered on the master at once to compute the medians (8 MiB of doubles)*/
+#ifndef MEDIAN_CHUNK_VALUES
+#define MEDIAN_CHUNK_VALUES (1 << 20)
+#endif
+
+/*set by sig_handler: the ranks leave the measurement loops together (see sync_stop) and write
+  their results as usual. The handler does nothing else, MPI calls are not async-signal-safe*/
+static volatile sig_atomic_t stop_requested = 0;
+static bool stopping = false;
+
+/*benchmarks that do not synchronize the ranks at every iteration check for the stop signal every
+  STOP_CHECK_ITERS iterations*/
+#ifndef STOP_CHECK_ITERS
+#define STOP_CHECK_ITERS 100
+#endif
+
 /*global variables because of signal handling*/
 static int my_rank;
 static int w_size;
@@ -46,6 +103,252 @@ static int warm_up_iters;
 static int max_samples;
 static double *durations;
 
+/*message sizes of a sweep, measured one after the other in the same launch*/
+static int *msg_sizes = NULL;
+static int num_msg_sizes = 0;
+static int curr_msg_size = -1;
+
+/*parse the value of -msgsize: a list of sizes and/or ranges, e.g. "8,64,1024", "8:1048576"
+  (powers of two) or "8:1048576:4" (custom factor). Returns the largest size, so that buffers
+  can be allocated once for the whole sweep*/
+static int parse_msg_sizes(const char *spec)
+{
+    char *copy = strdup(spec);
+    char *saveptr = NULL;
+    char *tok;
+    long first, last, factor, size;
+    int max_size = 0;
+    int n;
+
+    num_msg_sizes = 0;
+    for (tok = strtok_r(copy, ",", &saveptr); tok != NULL; tok = strtok_r(NULL, ",", &saveptr))
+    {
+        factor = 2;
+        n = sscanf(tok, "%ld:%ld:%ld", &first, &last, &factor);
+        if (n == 1)
+            last = first;
+        if (n < 1 || first < 0 || last < first || last > INT_MAX || (n > 1 && (first < 1 || factor < 2)))
+        {
+            fprintf(stderr, "Invalid -msgsize value: %s\n", tok);
+            exit(-1);
+        }
+        for (size = first; size <= last; size *= factor)
+        {
+            msg_sizes = (int *)realloc(msg_sizes, sizeof(int) * (num_msg_sizes + 1));
+            msg_sizes[num_msg_sizes++] = (int)size;
+            if (size > max_size)
+                max_size = (int)size;
+            if (size == 0)
+                break;
+        }
+    }
+    free(copy);
+    return max_size;
+}
+
+/*number of message sizes to measure (1 if -msgsize was not a sweep)*/
+static int sweep_length()
+{
+    return num_msg_sizes > 0 ? num_msg_sizes : 1;
+}
+
+/*message size measured at step 'idx' of the sweep ('msg_size' if there is no sweep)*/
+static int sweep_msg_size(int idx, int msg_size)
+{
+    if (num_msg_sizes > 0)
+        msg_size = msg_sizes[idx];
+    curr_msg_size = msg_size;
+    return msg_size;
+}
+
+/*tag the results of each size when sweeping, single-size output is unchanged*/
+static void print_msg_size_tag()
+{
+    if (num_msg_sizes > 1)
+        printf("MsgSize: %d\n", curr_msg_size);
+}
+
+/*binary results (-binout FILE): instead of printing the samples as text, the master rank writes
+  one block per message size to FILE: the magic "BLINKBIN", msg_size, rows and columns as
+  little-endian int64, then the rows x columns matrix of little-endian float64*/
+static const char *bin_out_path = NULL;
+static FILE *bin_out = NULL;
+
+/*per-iteration timestamps (-timestamps): the master rank records the CLOCK_REALTIME start of every
+  iteration, written as an extra Timestamp column (seconds since the epoch), so that the samples can be
+  aligned with the launch and exit of the other apps, which the engine records on the same clock*/
+static bool record_timestamps = false;
+static double *timestamps = NULL;
+
+/*start gate (-gate HOST:PORT:KEY): after the setup, the master rank checks in with the engine and
+  blocks until the engine releases every gated app at once, then all ranks leave a barrier together*/
+static const char *gate_spec = NULL;
+
+/*options shared by all the benchmarks: returns true if argv[*i] is one of them, moving *i past its value*/
+static bool parse_common_arg(int argc, char **argv, int *i)
+{
+    if (strcmp(argv[*i], "-binout") == 0 && *i + 1 < argc)
+    {
+        bin_out_path = argv[++(*i)];
+        return true;
+    }
+    if (strcmp(argv[*i], "-timestamps") == 0)
+    {
+        record_timestamps = true;
+        return true;
+    }
+    if (strcmp(argv[*i], "-gate") == 0 && *i + 1 < argc)
+    {
+        gate_spec = argv[++(*i)];
+        return true;
+    }
+    return false;
+}
+
+/*connect to the engine, send "READY <key>", wait for "GO" and answer "ACK <realtime>" (the engine logs
+  the release skew across apps). Returns false if the gate could not be reached*/
+static bool gate_handshake(const char *spec)
+{
+    char host[256], port[16], key[64], line[64];
+    const char *key_sep = strrchr(spec, ':');
+    const char *port_sep = key_sep != NULL ? key_sep - 1 : NULL;
+    while (port_sep != NULL && port_sep > spec && *port_sep != ':')
+        port_sep--;
+    if (key_sep == NULL || port_sep == NULL || *port_sep != ':' || (size_t)(port_sep - spec) >= sizeof(host) ||
+        (size_t)(key_sep - port_sep - 1) >= sizeof(port))
+        return false;
+    snprintf(host, sizeof(host), "%.*s", (int)(port_sep - spec), spec);
+    snprintf(port, sizeof(port), "%.*s", (int)(key_sep - port_sep - 1), port_sep + 1);
+    snprintf(key, sizeof(key), "%s", key_sep + 1);
+
+    struct addrinfo hints, *res, *ai;
+    memset(&hints, 0, sizeof(hints));
+    hints.ai_family = AF_UNSPEC;
+    hints.ai_socktype = SOCK_STREAM;
+    if (getaddrinfo(host, port, &hints, &res) != 0)
+        return false;
+    int fd = -1;
+    for (ai = res; ai != NULL && fd < 0; ai = ai->ai_next)
+    {
+        fd = socket(ai->ai_family, ai->ai_socktype, ai->ai_protocol);
+        if (fd >= 0 && connect(fd, ai->ai_addr, ai->ai_addrlen) != 0)
+        {
+            close(fd);
+            fd = -1;
+        }
+    }
+    freeaddrinfo(res);
+    if (fd < 0)
+        return false;
+
+    int len = snprintf(line, sizeof(line), "READY %s\n", key);
+    bool ok = write(fd, line, len) == len;
+    /*block until the release: read up to the end of the "GO" line*/
+    size_t got = 0;
+    while (ok && got < sizeof(line) - 1)
+    {
+        ssize_t n = read(fd, line + got, 1);
+        if (n <= 0)
+            ok = false;
+        else if (line[got++] == '\n')
+            break;
+    }
+    if (ok)
+    {
+        struct timespec ts;
+        clock_gettime(CLOCK_REALTIME, &ts);
+        len = snprintf(line, sizeof(line), "ACK %.9f\n", ts.tv_sec + ts.tv_nsec * 1e-9);
+        ok = write(fd, line, len) == len;
+    }
+    close(fd);
+    return ok;
+}
+
+/*called by every rank once the setup is done, right before the measurements start*/
+static void wait_start_gate()
+{
+    int rank;
+    if (gate_spec == NULL)
+        return;
+    MPI_Comm_rank(MPI_COMM_WORLD, &rank);
+    if (rank == master_rank && !gate_handshake(gate_spec))
+        fprintf(stderr, "Start gate %s not reachable, starting without it\n", gate_spec);
+    MPI_Barrier(MPI_COMM_WORLD);
+}
+
+/*called once max_samples and master_rank are known: only the master rank keeps timestamps*/
+static void alloc_timestamps()
+{
+    if (!record_timestamps || my_rank != master_rank)
+        return;
+    timestamps = (double *)malloc(sizeof(double) * max_samples);
+    if (timestamps == NULL)
+    {
+        fprintf(stderr, "Failed to allocate a buffer on rank %d\n", my_rank);
+        exit(-1);
+    }
+}
+
+/*called at the start of every iteration, before its measurement starts*/
+static inline void record_timestamp()
+{
+    if (timestamps != NULL)
+    {
+        struct timespec ts;
+        clock_gettime(CLOCK_REALTIME, &ts);
+        timestamps[curr_iters % max_samples] = ts.tv_sec + ts.tv_nsec * 1e-9;
+    }
+}
+
+/*copy the timestamps of the measured iterations in order, as write_results does with the durations*/
+static double *ordered_timestamps(int start_index, int num_samples)
+{
+    int i;
+    double *ordered = (double *)malloc(sizeof(double) * (num_samples > 0 ? num_samples : 1));
+    if (ordered == NULL)
+    {
+        fprintf(stderr, "Failed to allocate a buffer on rank %d\n", my_rank);
+        exit(-1);
+    }
+    for (i = 0; i < num_samples; i++)
+        ordered[i] = timestamps[(start_index + i) % max_samples];
+    return ordered;
+}
+
+/*write 'count' values of 'size' bytes in little-endian order*/
+static void fwrite_le(const void *values, size_t size, size_t count, FILE *f)
+{
+    const uint16_t one = 1;
+    if (*(const uint8_t *)&one == 1)
+    { /*little-endian host: the memory layout is already the file layout*/
+        fwrite(values, size, count, f);
+        return;
+    }
+    const unsigned char *bytes = (const unsigned char *)values;
+    size_t i, b;
+    for (i = 0; i < count; i++)
+        for (b = size; b > 0; b--)
+            fputc(bytes[i * size + b - 1], f);
+}
+
+static void write_binary_block(const double *matrix, int64_t rows, int64_t cols)
+{
+    int64_t header[3] = {curr_msg_size, rows, cols};
+    if (bin_out == NULL)
+    {
+        bin_out = fopen(bin_out_path, "wb");
+        if (bin_out == NULL)
+        {
+            fprintf(stderr, "Failed to open %s on rank %d\n", bin_out_path, my_rank);
+            exit(-1);
+        }
+    }
+    fwrite("BLINKBIN", 1, 8, bin_out);
+    fwrite_le(header, sizeof(int64_t), 3, bin_out);
+    fwrite_le(matrix, sizeof(double), rows * cols, bin_out);
+    fflush(bin_out);
+}
+
 static void write_results()
 {
     double duration_sum;
@@ -73,58 +376,136 @@ static void write_results()
     }
     
 
-    double *all_data =  (double *)malloc(sizeof(double)*num_samples*w_size);
-    double *sorting_buf = (double*)malloc(sizeof(double)*w_size);
-    
-    if(all_data == NULL || sorting_buf == NULL){
-        fprintf(stderr,"Failed to allocate a buffer on rank %d\n",my_rank);
-        exit(-1);
+    /*sum, min and max across ranks are reduced; the median is computed on the master over
+      chunks of iterations, so no rank ever holds num_samples*w_size values*/
+    int chunk = MEDIAN_CHUNK_VALUES / w_size;
+    if (chunk < 1)
+        chunk = 1;
+    if (chunk > num_samples)
+        chunk = num_samples > 0 ? num_samples : 1;
+
+    double *sum_buf = NULL;
+    double *min_buf = NULL;
+    double *max_buf = NULL;
+    double *median_buf = NULL;
+    double *chunk_data = NULL;
+    double *sorting_buf = NULL;
+    double *matrix = NULL;
+    double *ts_buf = NULL;
+    int cols = timestamps != NULL ? 6 : 5;
+    if (my_rank == master_rank)
+    {
+        size_t stats_size = sizeof(double) * (num_samples > 0 ? num_samples : 1);
+        sum_buf = (double *)malloc(stats_size);
+        min_buf = (double *)malloc(stats_size);
+        max_buf = (double *)malloc(stats_size);
+        median_buf = (double *)malloc(stats_size);
+        chunk_data = (double *)malloc(sizeof(double) * chunk * w_size);
+        sorting_buf = (double *)malloc(sizeof(double) * w_size);
+        if (bin_out_path != NULL)
+            matrix = (double *)malloc(stats_size * cols);
+        if (timestamps != NULL)
+            ts_buf = ordered_timestamps(start_index, num_samples);
+        if (sum_buf == NULL || min_buf == NULL || max_buf == NULL || median_buf == NULL || chunk_data == NULL ||
+            sorting_buf == NULL || (bin_out_path != NULL && matrix == NULL))
+        {
+            fprintf(stderr,"Failed to allocate a buffer on rank %d\n",my_rank);
+            exit(-1);
+        }
     }
 
     /*print file header*/
-    if (my_rank == master_rank)
+    if (my_rank == master_rank && bin_out_path == NULL)
     {
-        printf("Average,Minimum,Maximum,Median,MainRank\n");
+        print_msg_size_tag();
+        printf(timestamps != NULL ? "Average,Minimum,Maximum,Median,MainRank,Timestamp\n"
+                                  : "Average,Minimum,Maximum,Median,MainRank\n");
     }
 
-    // We need to first gather all the data
-    MPI_Gather(tmp_buf, num_samples, MPI_DOUBLE, all_data, num_samples, MPI_DOUBLE, master_rank, MPI_COMM_WORLD);
+    MPI_Reduce(tmp_buf, sum_buf, num_samples, MPI_DOUBLE, MPI_SUM, master_rank, MPI_COMM_WORLD);
+    MPI_Reduce(tmp_buf, min_buf, num_samples, MPI_DOUBLE, MPI_MIN, master_rank, MPI_COMM_WORLD);
+    MPI_Reduce(tmp_buf, max_buf, num_samples, MPI_DOUBLE, MPI_MAX, master_rank, MPI_COMM_WORLD);
+
+    int chunk_start, chunk_len, j, k;
+    for (chunk_start = 0; chunk_start < num_samples; chunk_start += chunk)
+    {
+        chunk_len = num_samples - chunk_start < chunk ? num_samples - chunk_start : chunk;
+        MPI_Gather(&tmp_buf[chunk_start], chunk_len, MPI_DOUBLE, chunk_data, chunk_len, MPI_DOUBLE, master_rank, MPI_COMM_WORLD);
+        if (my_rank != master_rank)
+            continue;
+        for (i = 0; i < chunk_len; i++)
+        {
+            for (j = 0; j < w_size; j++)
+                sorting_buf[j] = chunk_data[j * chunk_len + i];
+
+            k = (w_size - 1) / 2;
+            duration_median = select_kth(sorting_buf, w_size, k);
+            if (w_size % 2 == 0)
+            { /*even: then median as mean of middle values (the upper one is the smallest value after k)*/
+                double upper = sorting_buf[k + 1];
+                for (j = k + 2; j < w_size; j++)
+                    if (sorting_buf[j] < upper)
+                        upper = sorting_buf[j];
+                duration_median = (duration_median + upper) / 2;
+            }
+            median_buf[chunk_start + i] = duration_median;
+        }
+    }
 
     if(my_rank == master_rank){   
         for(i = 0; i < num_samples; i++){
-            int j;
-            duration_sum = 0;
-            for(j = 0; j < w_size; j++){
-                sorting_buf[j] = all_data[j*num_samples + i];
-                duration_sum += sorting_buf[j];
+            duration_sum = sum_buf[i];
+            if (matrix != NULL)
+            {
+                matrix[i * cols] = duration_sum / w_size;
+                matrix[i * cols + 1] = min_buf[i];
+                matrix[i * cols + 2] = max_buf[i];
+                matrix[i * cols + 3] = median_buf[i];
+                matrix[i * cols + 4] = tmp_buf[i];
+                if (ts_buf != NULL)
+                    matrix[i * cols + 5] = ts_buf[i];
             }
-
-            qsort(sorting_buf, w_size, sizeof(double), compare_doubles);
-            if (w_size % 2 == 0)
-            { /*even: then median as mean of middle values*/
-                duration_median = (sorting_buf[(w_size - 1) / 2] + sorting_buf[w_size / 2]) / 2;
+            else if (ts_buf != NULL)
+            {
+                printf("%.9f,%.9f,%.9f,%.9f,%.9f,%.6f\n", duration_sum / w_size, min_buf[i], max_buf[i], median_buf[i], tmp_buf[i], ts_buf[i]);
             }
             else
-            { /*odd: else median as middle value*/
-                duration_median = sorting_buf[(w_size - 1) / 2];
+            {
+                printf("%.9f,%.9f,%.9f,%.9f,%.9f\n", duration_sum / w_size, min_buf[i], max_buf[i], median_buf[i], tmp_buf[i]);
             }
-            printf("%.9f,%.9f,%.9f,%.9f,%.9f\n", duration_sum / w_size, sorting_buf[0], sorting_buf[w_size - 1], duration_median, tmp_buf[i]);
         }
+        if (matrix != NULL)
+            write_binary_block(matrix, num_samples, cols);
 
         printf("Ran %d iterations. Measured %d iterations.\n", curr_iters, num_samples);
         fflush(stdout);
     }
+    free(ts_buf);
+    free(matrix);
     free(sorting_buf);
-    free(all_data);   
+    free(chunk_data);
+    free(median_buf);
+    free(max_buf);
+    free(min_buf);
+    free(sum_buf);
     free(tmp_buf);
 }
 
 /*signal handler*/
 void sig_handler(int sig)
 {
-    write_results();
-    MPI_Finalize();
-    exit(0);
+    stop_requested = 1;
+}
+
+/*synchronizes the ranks before an iteration, as MPI_Barrier, and tells whether any of them got the
+  stop signal: ranks receive it at different times, they must agree on the iteration to stop at*/
+static bool sync_stop()
+{
+    int local = stop_requested;
+    int any = 0;
+    MPI_Allreduce(&local, &any, 1, MPI_INT, MPI_MAX, MPI_COMM_WORLD);
+    stopping = any != 0;
+    return stopping;
 }
 
 /*use Fisher-Yates to permute array*/
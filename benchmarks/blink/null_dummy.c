@@ -1 +1,8 @@
-int main(int argc, char** argv){}
+#include <mpi.h>
+
+/*does nothing but start and stop MPI: used to measure the launch overhead (srun/mpirun + MPI_Init/Finalize)*/
+int main(int argc, char** argv){
+    MPI_Init(&argc, &argv);
+    MPI_Finalize();
+    return 0;
+}
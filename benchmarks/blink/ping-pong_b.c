@@ -20,7 +20,7 @@ int main(int argc, char** argv){
     signal(SIGUSR1,sig_handler); //or SIGUSR1 here
 
     /*default values*/
-    int master_rank=0;
+    master_rank=0; /*global of common.h: write_results and the timestamps use it too*/
     bool master_rand=false;
     
     int rand_seed=1;
@@ -49,7 +49,7 @@ int main(int argc, char** argv){
             master_rand=true;
         }else if(strcmp(argv[i],"-msgsize")==0){
             ++i;
-            msg_size=atoi(argv[i]);
+            msg_size=parse_msg_sizes(argv[i]); /*largest size of the sweep*/
         }else if(strcmp(argv[i],"-endl")==0){
             endless=true;
         }else if(strcmp(argv[i],"-iter")==0){
@@ -77,6 +77,8 @@ int main(int argc, char** argv){
         }else if(strcmp(argv[i],"-maxsamples")==0){
             ++i;
             max_samples=atoi(argv[i]);
+        }else if(parse_common_arg(argc,argv,&i)){
+            /*option shared by all the benchmarks, see common.h*/
         }else{
             if(my_rank==master_rank){
                 fprintf(stderr, "Unknown argument: %s\n", argv[i]);
@@ -108,6 +110,7 @@ int main(int argc, char** argv){
     send_buf=(unsigned char*)malloc_align(send_buf_size);
     recv_buf=(unsigned char*)malloc_align(recv_buf_size);
     durations=(double *)malloc_align(sizeof(double)*max_samples);
+    alloc_timestamps(); /*only with -timestamps*/
     
     if(send_buf==NULL || recv_buf==NULL ||  durations==NULL){
         fprintf(stderr,"Failed to allocate a buffer on rank %d\n",my_rank);
@@ -125,102 +128,137 @@ int main(int argc, char** argv){
     }
     
     
-    /*print basic info to stdout*/
-    if(my_rank==master_rank){
-        if(endless){
-            printf("Ping-pong with %d processes, msg-size: %d, test iterations: endless.\n"
-                    ,w_size,msg_size);
-        }else{
-            printf("Ping-pong with %d processes, msg-size: %d, test iterations: %d.\n"
-                    ,w_size,msg_size,max_iters);
-        }
-    }
-    /*measured iterations*/
-    double burst_start_time;
-    double measure_start_time;
+    /*measure each message size of the sweep, buffers are sized for the largest one*/
     double burst_length_mean=burst_length;
     double burst_pause_mean=burst_pause;
-    bool burst_cont=false;
-    int receiver_rank;
-    curr_iters=0;
-    
-    if(master_rank==0){
-        receiver_rank=1;
-    }else{
-        receiver_rank=0;
-    }
+    int size_idx;
+    wait_start_gate(); /*only with -gate*/
+    for(size_idx=0;size_idx<sweep_length() && !stopping;size_idx++){
+        msg_size=sweep_msg_size(size_idx,msg_size);
+        /*print basic info to stdout*/
+        if(my_rank==master_rank){
+            if(endless){
+                printf("Ping-pong with %d processes, msg-size: %d, test iterations: endless.\n"
+                        ,w_size,msg_size);
+            }else{
+                printf("Ping-pong with %d processes, msg-size: %d, test iterations: %d.\n"
+                        ,w_size,msg_size,max_iters);
+            }
+        }
+        /*measured iterations*/
+        double burst_start_time;
+        double measure_start_time;
+        bool burst_cont=false;
+        int receiver_rank;
+        curr_iters=0;
     
-    MPI_Barrier(MPI_COMM_WORLD);
-    do{
-        for(k=0;k<max_iters+warm_up_iters;k++){
-            if(burst_length_rand){ /*randomized burst length*/
-                burst_length=rand_expo(burst_length_mean);
-            }        
-            burst_start_time=MPI_Wtime();
-            do{
-                if(burst_length){ // If no bursts, no need to do the barrier before (received will be most likely already waiting on the recv)
-                    MPI_Barrier(MPI_COMM_WORLD);
-                }
-                measure_start_time=MPI_Wtime();
-                for(i=0;i<measure_granularity;i++){
-                    if(my_rank==master_rank){
-                        MPI_Send(send_buf,msg_size,MPI_BYTE,receiver_rank,my_rank,MPI_COMM_WORLD);
-                        MPI_Recv(recv_buf,msg_size,MPI_BYTE, MPI_ANY_SOURCE
-                                    ,MPI_ANY_TAG, MPI_COMM_WORLD,MPI_STATUS_IGNORE); // TODO: Any tag is not good!
-                    }else{
-                        MPI_Recv(recv_buf,msg_size,MPI_BYTE,MPI_ANY_SOURCE,MPI_ANY_TAG,
-                                MPI_COMM_WORLD,MPI_STATUS_IGNORE);
-                        MPI_Send(send_buf,msg_size,MPI_BYTE,master_rank,my_rank,MPI_COMM_WORLD);
+        if(master_rank==0){
+            receiver_rank=1;
+        }else{
+            receiver_rank=0;
+        }
+    
+        MPI_Barrier(MPI_COMM_WORLD);
+        do{
+            for(k=0;k<max_iters+warm_up_iters && !stopping;k++){
+                if(burst_length_rand){ /*randomized burst length*/
+                    burst_length=rand_expo(burst_length_mean);
+                }        
+                burst_start_time=MPI_Wtime();
+                do{
+                    if(burst_length){ // If no bursts, no need to do the barrier before (received will be most likely already waiting on the recv)
+                        if(sync_stop()) break; /*barrier, stops all the ranks together after SIGUSR1*/
+                    }else if(curr_iters%STOP_CHECK_ITERS==0 && sync_stop()){
+                        break;
                     }
-                }
-                durations[curr_iters%max_samples]=MPI_Wtime()-measure_start_time; /*write result to buffer (lru space)*/
-                curr_iters++;
-                if(burst_length!=0){ /*bcast needed for synch if bursts timed*/
-                    if(my_rank==master_rank){ /*master decides if burst should be continued*/
-                        burst_cont=((MPI_Wtime()-burst_start_time)<burst_length);
+                    record_timestamp();
+                    measure_start_time=MPI_Wtime();
+                    for(i=0;i<measure_granularity;i++){
+                        if(my_rank==master_rank){
+                            MPI_Send(send_buf,msg_size,MPI_BYTE,receiver_rank,my_rank,MPI_COMM_WORLD);
+                            MPI_Recv(recv_buf,msg_size,MPI_BYTE, MPI_ANY_SOURCE
+                                        ,MPI_ANY_TAG, MPI_COMM_WORLD,MPI_STATUS_IGNORE); // TODO: Any tag is not good!
+                        }else{
+                            MPI_Recv(recv_buf,msg_size,MPI_BYTE,MPI_ANY_SOURCE,MPI_ANY_TAG,
+                                    MPI_COMM_WORLD,MPI_STATUS_IGNORE);
+                            MPI_Send(send_buf,msg_size,MPI_BYTE,master_rank,my_rank,MPI_COMM_WORLD);
+                        }
                     }
-                    MPI_Bcast(&burst_cont,1,MPI_INT,master_rank,MPI_COMM_WORLD); /*bcast the masters decision*/
-                }
-            }while(burst_cont);
-            if(burst_pause!=0){
-                if(burst_pause_rand){ /*randomized break length*/
-                    burst_pause=rand_expo(burst_pause_mean);
+                    durations[curr_iters%max_samples]=MPI_Wtime()-measure_start_time; /*write result to buffer (lru space)*/
+                    curr_iters++;
+                    if(burst_length!=0){ /*bcast needed for synch if bursts timed*/
+                        if(my_rank==master_rank){ /*master decides if burst should be continued*/
+                            burst_cont=((MPI_Wtime()-burst_start_time)<burst_length);
+                        }
+                        MPI_Bcast(&burst_cont,1,MPI_INT,master_rank,MPI_COMM_WORLD); /*bcast the masters decision*/
+                    }
+                }while(burst_cont);
+                if(burst_pause!=0){
+                    if(burst_pause_rand){ /*randomized break length*/
+                        burst_pause=rand_expo(burst_pause_mean);
+                    }
+                    dsleep(burst_pause);
                 }
-                dsleep(burst_pause);
             }
-        }
-    }while(endless);
-    /*write results to file*/
-    MPI_Barrier(MPI_COMM_WORLD);
+        }while(endless && !stopping);
+        /*write results to file*/
+        MPI_Barrier(MPI_COMM_WORLD);
     
 
-    // For pingpong we can avoid doing allgather etc from common.h (we just need to report rank 0 time)
-    if(my_rank==master_rank){
-        int num_samples;
-        int start_index;
-        if (curr_iters - warm_up_iters > max_samples)
-        {
-            num_samples = max_samples;
-            start_index = curr_iters % max_samples;        
-        }
-        else
-        {
-            num_samples = curr_iters - warm_up_iters;
-            start_index = warm_up_iters;
-        }
-        printf("Time,Bandwidth\n");
-        for(i = 0; i < num_samples; i++){
-            float time = durations[(start_index + i) % max_samples]/2;
-            float bandwidth = ((msg_size * 8.0) / 1000000000.0) / time;
-            printf("%.9f,%.9f\n", time, bandwidth);
+        // For pingpong we can avoid doing allgather etc from common.h (we just need to report rank 0 time)
+        if(my_rank==master_rank){
+            int num_samples;
+            int start_index;
+            if (curr_iters - warm_up_iters > max_samples)
+            {
+                num_samples = max_samples;
+                start_index = curr_iters % max_samples;        
+            }
+            else
+            {
+                num_samples = curr_iters - warm_up_iters;
+                start_index = warm_up_iters;
+            }
+            double *matrix = NULL;
+            double *ts_buf = NULL;
+            int cols = 2;
+            if(timestamps != NULL){
+                ts_buf = ordered_timestamps(start_index, num_samples);
+                cols = 3;
+            }
+            if(bin_out_path != NULL){
+                matrix = (double*)malloc_align(sizeof(double)*cols*(num_samples > 0 ? num_samples : 1));
+            }else{
+                print_msg_size_tag();
+                printf(ts_buf != NULL ? "Time,Bandwidth,Timestamp\n" : "Time,Bandwidth\n");
+            }
+            for(i = 0; i < num_samples; i++){
+                float time = durations[(start_index + i) % max_samples]/2;
+                float bandwidth = ((msg_size * 8.0) / 1000000000.0) / time;
+                if(matrix != NULL){
+                    matrix[cols*i] = time;
+                    matrix[cols*i+1] = bandwidth;
+                    if(ts_buf != NULL) matrix[cols*i+2] = ts_buf[i];
+                }else if(ts_buf != NULL){
+                    printf("%.9f,%.9f,%.6f\n", time, bandwidth, ts_buf[i]);
+                }else{
+                    printf("%.9f,%.9f\n", time, bandwidth);
+                }
+            }
+            if(matrix != NULL){
+                write_binary_block(matrix, num_samples, cols);
+                free(matrix);
+            }
+            free(ts_buf);
+            printf("Ran %d iterations. Measured %d iterations.\n", curr_iters, num_samples);
+            fflush(stdout);
         }
-        printf("Ran %d iterations. Measured %d iterations.\n", curr_iters, num_samples);
-        fflush(stdout);
     }
 
     
     /*free allocated buffers*/
     free(durations);
+    free(timestamps);
     free(send_buf);
     free(recv_buf);
     
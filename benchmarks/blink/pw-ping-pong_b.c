@@ -21,7 +21,7 @@ int main(int argc, char** argv){
     signal(SIGUSR1,sig_handler); //or SIGUSR1 here
 
     /*default values*/
-    int master_rank=0;
+    master_rank=0; /*global of common.h: write_results and the timestamps use it too*/
     bool master_rand=false;
     
     int rand_seed=1;
@@ -51,7 +51,7 @@ int main(int argc, char** argv){
             master_rand=true;
         }else if(strcmp(argv[i],"-msgsize")==0){
             ++i;
-            msg_size=atoi(argv[i]);
+            msg_size=parse_msg_sizes(argv[i]); /*largest size of the sweep*/
         }else if(strcmp(argv[i],"-endl")==0){
             endless=true;
         }else if(strcmp(argv[i],"-iter")==0){
@@ -79,6 +79,8 @@ int main(int argc, char** argv){
         }else if(strcmp(argv[i],"-maxsamples")==0){
             ++i;
             max_samples=atoi(argv[i]);
+        }else if(parse_common_arg(argc,argv,&i)){
+            /*option shared by all the benchmarks, see common.h*/
         }else{
             if(my_rank==master_rank){
                 fprintf(stderr, "Unknown argument: %s\n", argv[i]);
@@ -120,6 +122,7 @@ int main(int argc, char** argv){
     send_buf=(unsigned char*)malloc_align(send_buf_size);
     recv_buf=(unsigned char*)malloc_align(recv_buf_size);
     durations=(double *)malloc_align(sizeof(double)*max_samples);
+    alloc_timestamps(); /*only with -timestamps*/
         
     if(send_buf==NULL || recv_buf==NULL   || durations==NULL){
         fprintf(stderr,"Failed to allocate a buffer on rank %d\n",my_rank);
@@ -140,91 +143,99 @@ int main(int argc, char** argv){
         printf("\n");   
     }*/
     
-    /*print basic info to stdout*/
-    if(my_rank==master_rank){
-        if(endless){
-            printf("Pairwise pingpong with %d processes, msg-size: %d, test iterations: endless.\n"
-                    ,w_size,msg_size);
-        }else{
-            printf("Pairwise pingpong with %d processes, msg-size: %d, test iterations: %d.\n"
-                    ,w_size,msg_size,max_iters);
-        }
-    }
-    
-    /*measured iterations*/
-    double burst_start_time;
-    double measure_start_time;
+    /*measure each message size of the sweep, buffers are sized for the largest one*/
     double burst_length_mean=burst_length;
     double burst_pause_mean=burst_pause;
-    bool burst_cont=false;
-    int partner;
-    curr_iters=0;
-    
-    if(my_rank<w_size/2){
-        partner=my_rank+w_size/2;
-    }else{
-        partner=my_rank-w_size/2;
-    }
+    int size_idx;
+    wait_start_gate(); /*only with -gate*/
+    for(size_idx=0;size_idx<sweep_length() && !stopping;size_idx++){
+        msg_size=sweep_msg_size(size_idx,msg_size);
+        /*print basic info to stdout*/
+        if(my_rank==master_rank){
+            if(endless){
+                printf("Pairwise pingpong with %d processes, msg-size: %d, test iterations: endless.\n"
+                        ,w_size,msg_size);
+            }else{
+                printf("Pairwise pingpong with %d processes, msg-size: %d, test iterations: %d.\n"
+                        ,w_size,msg_size,max_iters);
+            }
+        }
     
-    MPI_Barrier(MPI_COMM_WORLD);
-    do{
-        for(k=0;k<max_iters+warm_up_iters;k++){
-            if(burst_length_rand){ /*randomized burst length*/
-                burst_length=rand_expo(burst_length_mean);
-            }        
-            burst_start_time=MPI_Wtime();
-            do{
-                MPI_Barrier(MPI_COMM_WORLD);
-                if(my_rank<w_size/2){
-                    measure_start_time=MPI_Wtime();
-                    for(i=0;i<measure_granularity;i++){
-                        MPI_Send(send_buf,msg_size,MPI_BYTE,partner,0,MPI_COMM_WORLD);
-                        MPI_Recv(recv_buf,msg_size,MPI_BYTE,partner,1,MPI_COMM_WORLD,MPI_STATUS_IGNORE);
-                    }
-                    durations[curr_iters%max_samples]=(MPI_Wtime()-measure_start_time)/2.0; /*write result to buffer (lru space)*/
-                }else{
-                    for(i=0;i<measure_granularity;i++){
-                        MPI_Recv(recv_buf,msg_size,MPI_BYTE,partner,0,MPI_COMM_WORLD,MPI_STATUS_IGNORE);
-                        MPI_Send(send_buf,msg_size,MPI_BYTE,partner,1,MPI_COMM_WORLD);
-                    }
-                }
-                /*other-way around*/
-                if(my_rank>=w_size/2){
-                    measure_start_time=MPI_Wtime();
-                    for(i=0;i<measure_granularity;i++){
-                        MPI_Send(send_buf,msg_size,MPI_BYTE,partner,0,MPI_COMM_WORLD);
-                        MPI_Recv(recv_buf,msg_size,MPI_BYTE,partner,1,MPI_COMM_WORLD,MPI_STATUS_IGNORE);
+        /*measured iterations*/
+        double burst_start_time;
+        double measure_start_time;
+        bool burst_cont=false;
+        int partner;
+        curr_iters=0;
+    
+        if(my_rank<w_size/2){
+            partner=my_rank+w_size/2;
+        }else{
+            partner=my_rank-w_size/2;
+        }
+    
+        MPI_Barrier(MPI_COMM_WORLD);
+        do{
+            for(k=0;k<max_iters+warm_up_iters && !stopping;k++){
+                if(burst_length_rand){ /*randomized burst length*/
+                    burst_length=rand_expo(burst_length_mean);
+                }        
+                burst_start_time=MPI_Wtime();
+                do{
+                    if(sync_stop()) break; /*barrier, stops all the ranks together after SIGUSR1*/
+                    record_timestamp();
+                    if(my_rank<w_size/2){
+                        measure_start_time=MPI_Wtime();
+                        for(i=0;i<measure_granularity;i++){
+                            MPI_Send(send_buf,msg_size,MPI_BYTE,partner,0,MPI_COMM_WORLD);
+                            MPI_Recv(recv_buf,msg_size,MPI_BYTE,partner,1,MPI_COMM_WORLD,MPI_STATUS_IGNORE);
+                        }
+                        durations[curr_iters%max_samples]=(MPI_Wtime()-measure_start_time)/2.0; /*write result to buffer (lru space)*/
+                    }else{
+                        for(i=0;i<measure_granularity;i++){
+                            MPI_Recv(recv_buf,msg_size,MPI_BYTE,partner,0,MPI_COMM_WORLD,MPI_STATUS_IGNORE);
+                            MPI_Send(send_buf,msg_size,MPI_BYTE,partner,1,MPI_COMM_WORLD);
+                        }
                     }
-                    durations[curr_iters%max_samples]=(MPI_Wtime()-measure_start_time)/2.0; /*write result to buffer (lru space)*/
-                }else{
-                    for(i=0;i<measure_granularity;i++){
-                        MPI_Recv(recv_buf,msg_size,MPI_BYTE,partner,0,MPI_COMM_WORLD,MPI_STATUS_IGNORE);
-                        MPI_Send(send_buf,msg_size,MPI_BYTE,partner,1,MPI_COMM_WORLD);
+                    /*other-way around*/
+                    if(my_rank>=w_size/2){
+                        measure_start_time=MPI_Wtime();
+                        for(i=0;i<measure_granularity;i++){
+                            MPI_Send(send_buf,msg_size,MPI_BYTE,partner,0,MPI_COMM_WORLD);
+                            MPI_Recv(recv_buf,msg_size,MPI_BYTE,partner,1,MPI_COMM_WORLD,MPI_STATUS_IGNORE);
+                        }
+                        durations[curr_iters%max_samples]=(MPI_Wtime()-measure_start_time)/2.0; /*write result to buffer (lru space)*/
+                    }else{
+                        for(i=0;i<measure_granularity;i++){
+                            MPI_Recv(recv_buf,msg_size,MPI_BYTE,partner,0,MPI_COMM_WORLD,MPI_STATUS_IGNORE);
+                            MPI_Send(send_buf,msg_size,MPI_BYTE,partner,1,MPI_COMM_WORLD);
+                        }
+                    }               
+                    curr_iters++;
+                    if(burst_length!=0){ /*bcast needed for synch if bursts timed*/
+                        if(my_rank==master_rank){ /*master decides if burst should be continued*/
+                            burst_cont=((MPI_Wtime()-burst_start_time)<burst_length);
+                        }
+                        MPI_Bcast(&burst_cont,1,MPI_INT,master_rank,MPI_COMM_WORLD); /*bcast the masters decision*/
                     }
-                }               
-                curr_iters++;
-                if(burst_length!=0){ /*bcast needed for synch if bursts timed*/
-                    if(my_rank==master_rank){ /*master decides if burst should be continued*/
-                        burst_cont=((MPI_Wtime()-burst_start_time)<burst_length);
+                }while(burst_cont);
+                if(burst_pause!=0){
+                    if(burst_pause_rand){ /*randomized break length*/
+                        burst_pause=rand_expo(burst_pause_mean);
                     }
-                    MPI_Bcast(&burst_cont,1,MPI_INT,master_rank,MPI_COMM_WORLD); /*bcast the masters decision*/
-                }
-            }while(burst_cont);
-            if(burst_pause!=0){
-                if(burst_pause_rand){ /*randomized break length*/
-                    burst_pause=rand_expo(burst_pause_mean);
+                    dsleep(burst_pause);
                 }
-                dsleep(burst_pause);
             }
-        }
-    }while(endless);
+        }while(endless && !stopping);
 
-    /*write results to file*/
-    MPI_Barrier(MPI_COMM_WORLD);
-    write_results();
+        /*write results to file*/
+        MPI_Barrier(MPI_COMM_WORLD);
+        write_results();
+    }
     
     /*free allocated buffers*/
     free(durations);
+    free(timestamps);
     free(send_buf);
     free(recv_buf);
     
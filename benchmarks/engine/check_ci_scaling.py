@@ -0,0 +1,52 @@
+"""
+Measures the cost of check_CI as a DataContainer grows, up to 10^7 samples.
+
+The convergence check reads the running statistics kept by DataContainer.add_samples,
+so the time per check must stay flat while the number of stored samples grows.
+
+Usage: python benchmarks/engine/check_ci_scaling.py [--total 10000000] [--batch 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'src')))
+
+from crab.core.engine import DataContainer, check_CI
+
+
+def main():
+    parser = argparse.ArgumentParser(description="check_CI scaling benchmark.")
+    parser.add_argument("--total", type=int, default=10_000_000, help="Total number of samples.")
+    parser.add_argument("--batch", type=int, default=100_000, help="Samples added per run.")
+    parser.add_argument("--repeat", type=int, default=50, help="check_CI calls timed per run.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    # beta=0 never converges, so every call does the full CI computation
+    container = DataContainer(0, True, "Avg-Duration", "s")
+
+    print(f"{'samples':>12} {'add (ms)':>10} {'check (us)':>11}")
+    run = 0
+    while container.count < args.total:
+        batch = rng.normal(1.0, 0.1, args.batch)
+        t = time.perf_counter()
+        container.add_samples(batch)
+        add_ms = (time.perf_counter() - t) * 1e3
+        run += 1
+
+        t = time.perf_counter()
+        for _ in range(args.repeat):
+            container.converged = False
+            check_CI([container], 0.05, 0.0, False, run)
+        check_us = (time.perf_counter() - t) / args.repeat * 1e6
+
+        if run == 1 or container.count % (args.total // 10) == 0:
+            print(f"{container.count:>12} {add_ms:>10.2f} {check_us:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Checks that blink_plotter.LoadDataset keeps the columns of every app of an experiment.
+
+Writes a parquet and an arrow campaign where two apps with different metrics (ping-pong-like
+and barrier-like) share one experiment dataset, through the engine's own result sink, loads
+them back and fails if a metric column is missing or has lost the samples of its app.
+
+Usage: python benchmarks/engine/check_mixed_dataset.py
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+CRAB_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(CRAB_ROOT, 'src'))
+sys.path.insert(0, CRAB_ROOT)
+
+from crab.core.engine import DataContainer
+from crab.core.results import ColumnarResultSink
+from blink_plotter import LoadDataset
+
+# Metrics of each app: (label, unit)
+APPS = {
+    0: [("MainRank-Duration", "s"), ("MainRank-Bandwidth", "Gb/s")],
+    1: [("Avg-Duration", "s"), ("Min-Duration", "s"), ("Max-Duration", "s"), ("Median-Duration", "s")],
+}
+RUNS = 2
+SAMPLES = 5
+
+
+def write_campaign(root: str, out_format: str) -> str:
+    exp_data = os.path.join(root, "run", "mixed", "data")
+    sink = ColumnarResultSink(exp_data, out_format)
+    for app_id, metrics in APPS.items():
+        containers = [DataContainer(app_id, True, label, unit, 8, retain=False) for label, unit in metrics]
+        for run in range(1, RUNS + 1):
+            sink.write_run(app_id, run, containers, [np.full(SAMPLES, 1.0 + app_id) for _ in containers])
+    description = os.path.join(root, "description.csv")
+    with open(description, 'w') as f:
+        f.write("system,numnodes,extra,path\n")
+        f.write(f"local,2,check,{os.path.join(root, 'run')}\n")
+    return description
+
+
+def main():
+    failures = []
+    for out_format in ("parquet", "arrow"):
+        with tempfile.TemporaryDirectory() as root:
+            df = LoadDataset(write_campaign(root, out_format), out_format)
+            for app_id, metrics in APPS.items():
+                rows = df[df["app_id"] == app_id]
+                if len(rows) != RUNS * SAMPLES:
+                    failures.append(f"{out_format}: app {app_id} has {len(rows)} rows, expected {RUNS * SAMPLES}")
+                for label, unit in metrics:
+                    column = f"{label}_{unit}"
+                    if column not in df.columns:
+                        failures.append(f"{out_format}: column {column} of app {app_id} is missing")
+                    elif rows[column].isna().any():
+                        failures.append(f"{out_format}: column {column} lost samples of app {app_id}")
+        print(f"{out_format}: {len(df)} rows, columns {sorted(df.columns)}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: every app keeps its columns")
+
+
+if __name__ == "__main__":
+    main()
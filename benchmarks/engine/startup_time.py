@@ -0,0 +1,69 @@
+"""
+Startup-time regression benchmark for the orchestrator path: `cli.py -c <config> -p local`.
+
+sbatch is replaced by a stub on PATH, so the measurement covers only CRAB itself: preset
+merging, config/environment dumps, sbatch header rendering and the submission call.
+The orchestrator must not import the numeric stack (numpy, scipy, pandas); the benchmark
+fails if any of them shows up in `python -X importtime`.
+
+Usage: python benchmarks/engine/startup_time.py [--repeat 10] [--max-median 1.0]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CRAB_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+HEAVY_MODULES = ('numpy', 'scipy', 'pandas')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orchestrator startup-time benchmark.")
+    parser.add_argument("--repeat", type=int, default=10, help="Number of timed invocations.")
+    parser.add_argument("--max-median", type=float, default=None, help="Fail if the median time (s) exceeds this.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stub = os.path.join(tmp, 'sbatch')
+        with open(stub, 'w') as f:
+            f.write('#!/bin/sh\necho "Submitted batch job 0"\n')
+        os.chmod(stub, 0o755)
+
+        config_file = os.path.join(tmp, 'config.json')
+        with open(config_file, 'w') as f:
+            json.dump({
+                "global_options": {"numnodes": "1", "ppn": "1", "datapath": os.path.join(tmp, 'data')},
+                "applications": {"0": {"path": "null_dummy.py", "args": "", "collect": False, "start": "0", "end": ""}}
+            }, f)
+
+        env = dict(os.environ, PATH=tmp + os.pathsep + os.environ.get('PATH', ''))
+        cmd = [sys.executable, os.path.join(CRAB_ROOT, 'cli.py'), '-c', config_file, '-p', 'local']
+
+        # Import check
+        out = subprocess.run([sys.executable, '-X', 'importtime'] + cmd[1:], cwd=CRAB_ROOT, env=env,
+                             capture_output=True, text=True, check=True)
+        imported = {line.split('|')[-1].strip().split('.')[0] for line in out.stderr.splitlines() if '|' in line}
+        heavy = sorted(imported.intersection(HEAVY_MODULES))
+
+        # Timing
+        times = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            subprocess.run(cmd, cwd=CRAB_ROOT, env=env, capture_output=True, check=True)
+            times.append(time.perf_counter() - t)
+
+    median = statistics.median(times)
+    print(f"cli.py -p local: min {min(times)*1000:.1f} ms, median {median*1000:.1f} ms, max {max(times)*1000:.1f} ms "
+          f"({args.repeat} runs)")
+    print(f"numeric modules imported: {', '.join(heavy) if heavy else 'none'}")
+
+    if heavy or (args.max_median is not None and median > args.max_median):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -657,6 +657,38 @@ def LoadData(data, data_folder, systems, collectives, messages, nodes):
                     data['avg_latency'].extend([avg_lat/row_counter] * row_counter)
         
 
+def LoadDataset(data_folder, out_format="parquet"):
+    """
+    Loads a whole campaign written with outformat "parquet" or "arrow" into a single DataFrame.
+    Every experiment dataset is read in one vectorized pass (no per-row parsing) and tagged with
+    the system, numnodes, extra and experiment it belongs to.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    description = pd.read_csv(data_folder)
+    tables = []
+    for row in description.itertuples(index=False):
+        for dataset_dir in sorted(glob.glob(os.path.join(row.path, "*", "data"))):
+            if not os.path.isdir(dataset_dir):
+                continue
+            fmt = "parquet" if out_format == "parquet" else "ipc"
+            dataset = ds.dataset(dataset_dir, format=fmt, partitioning="hive")
+            # A dataset takes its schema from the first file found: apps with other metrics would lose their columns
+            schema = pa.unify_schemas([dataset.schema] + [f.physical_schema for f in dataset.get_fragments()],
+                                      promote_options="permissive")
+            table = ds.dataset(dataset_dir, format=fmt, partitioning="hive", schema=schema).to_table()
+            for name, value in (("system", row.system), ("numnodes", int(row.numnodes)),
+                                ("extra", str(row.extra)),
+                                ("experiment", os.path.basename(os.path.dirname(dataset_dir)))):
+                table = table.append_column(name, pa.array([value] * table.num_rows))
+            tables.append(table)
+
+    if not tables:
+        return pd.DataFrame()
+    return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+
 def SpeedupSCALE(data, collective):
     df = pd.DataFrame(data)
     print("Speedup starting")
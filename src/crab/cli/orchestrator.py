@@ -72,6 +72,7 @@ def run_from_cli():
         try:
             workdir_index = sys.argv.index("--workdir") + 1
             work_dir = sys.argv[workdir_index]
+            resume = "--resume" in sys.argv
 
             config_file = os.path.join(work_dir, 'config.json')
             env_file = os.path.join(work_dir, 'environment.json')
@@ -96,7 +97,8 @@ def run_from_cli():
                 config=benchmark_config, 
                 environment=execution_env,
                 is_worker=True,
-                output_dir=work_dir
+                output_dir=work_dir,
+                resume=resume
             )
 
             elapsed_time = time.time() - start
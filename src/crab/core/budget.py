@@ -0,0 +1,85 @@
+import math
+import os
+import time
+from typing import Dict, List, Optional
+
+
+def parse_walltime(value: str) -> float:
+    """Parses a Slurm time limit ('MM', 'MM:SS', 'HH:MM:SS', 'D-HH', 'D-HH:MM', 'D-HH:MM:SS') into seconds."""
+    value = str(value).strip()
+    days = 0
+    if '-' in value:
+        d, value = value.split('-', 1)
+        days = int(d)
+        parts = [int(x) for x in value.split(':')]
+        parts += [0] * (3 - len(parts)) # D-HH and D-HH:MM
+        hours, minutes, seconds = parts
+    else:
+        parts = [int(x) for x in value.split(':')]
+        if len(parts) == 1:
+            hours, minutes, seconds = 0, parts[0], 0
+        elif len(parts) == 2:
+            hours, (minutes, seconds) = 0, parts
+        else:
+            hours, minutes, seconds = parts
+    return float(((days * 24 + hours) * 60 + minutes) * 60 + seconds)
+
+
+class TimeBudget:
+    """
+    Splits the time left in the allocation across the experiments of a worker.
+
+    The end of the allocation is read from SLURM_JOB_END_TIME or, failing that, computed from the
+    configured walltime. Run durations are learnt from completed runs; an experiment may run past
+    'minruns' only while the time left covers its next run plus 'minruns' runs of every experiment
+    still to start, and no run is started if it would not end before the safety margin.
+    """
+    def __init__(self, walltime: Optional[str], margin: float, min_runs: int, pending: List[str]):
+        self.margin = margin
+        self.min_runs = min_runs
+        self.pending = list(pending)
+        self.durations: Dict[str, List[float]] = {}
+
+        self.end_time: Optional[float] = None
+        if os.environ.get('SLURM_JOB_END_TIME'):
+            self.end_time = float(os.environ['SLURM_JOB_END_TIME'])
+        elif walltime:
+            start = float(os.environ.get('SLURM_JOB_START_TIME', time.time()))
+            self.end_time = start + parse_walltime(walltime)
+
+    def remaining(self) -> float:
+        """Seconds left before the safety margin (inf if the end of the allocation is unknown)."""
+        if self.end_time is None: return math.inf
+        return self.end_time - self.margin - time.time()
+
+    def start_experiment(self, exp_name: str):
+        if exp_name in self.pending:
+            self.pending.remove(exp_name)
+
+    def record_run(self, exp_name: str, duration: float):
+        self.durations.setdefault(exp_name, []).append(duration)
+
+    def estimate(self, exp_name: Optional[str] = None) -> Optional[float]:
+        """Mean run duration of 'exp_name', or of all the runs seen so far if it has none."""
+        samples = self.durations.get(exp_name) or [d for runs in self.durations.values() for d in runs]
+        return sum(samples) / len(samples) if samples else None
+
+    def reserved(self) -> float:
+        """Time kept aside so that every experiment still to start reaches 'minruns'."""
+        est = self.estimate()
+        return len(self.pending) * self.min_runs * est if est else 0.0
+
+    def max_runs(self, exp_name: str, runs_done: int, max_runs: int) -> int:
+        """Caps 'max_runs' to the runs of 'exp_name' that fit in the time left."""
+        est = self.estimate(exp_name)
+        if est is None or math.isinf(self.remaining()): return max_runs
+        affordable = runs_done + int(max(0.0, self.remaining() - self.reserved()) // est)
+        return min(max_runs, max(affordable, self.min_runs))
+
+    def allow_run(self, exp_name: str, runs_done: int) -> bool:
+        """True if one more run of 'exp_name' fits in the budget."""
+        remaining = self.remaining()
+        est = self.estimate(exp_name) or 0.0
+        if runs_done < self.min_runs:
+            return remaining > est
+        return remaining - self.reserved() > est
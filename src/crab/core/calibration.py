@@ -0,0 +1,60 @@
+import json
+import os
+import statistics
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class LaunchCalibration:
+    """
+    Launch overhead of the workload manager, measured by running the null_dummy benchmark
+    (MPI_Init + MPI_Finalize only) for every allocation shape (nodes x ppn) used by the experiments:
+    the wall time of such a job is what srun/mpirun spend launching and tearing down an app.
+
+    Samples are kept for the whole allocation (the overhead depends on the nodes, not on the
+    experiment) and written to '<workdir>/calibration.json' after every shape is measured.
+    Experiments running concurrently share it, so updates are serialized.
+    """
+    FILE_NAME = 'calibration.json'
+
+    def __init__(self, work_dir: str):
+        self.path = os.path.join(work_dir, self.FILE_NAME)
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def shape(num_nodes: int, ppn: int) -> str:
+        return f"{num_nodes}x{ppn}"
+
+    def has(self, shape: str) -> bool:
+        return shape in self.samples or shape in self.errors
+
+    def add(self, shape: str, samples: List[float], error: str = ""):
+        with self.lock:
+            if samples:
+                self.samples[shape] = samples
+            if error:
+                self.errors[shape] = error
+            self._write()
+
+    def overhead(self, shape: str) -> Optional[float]:
+        """Median launch + teardown time (s) of the shape, None if it was not measured."""
+        samples = self.samples.get(shape)
+        return statistics.median(samples) if samples else None
+
+    def summary(self, shape: str) -> Dict[str, Any]:
+        samples = sorted(self.samples.get(shape, []))
+        if not samples:
+            return {'runs': 0, 'error': self.errors.get(shape, "")}
+        return {'runs': len(samples), 'min': samples[0], 'median': statistics.median(samples),
+                'p90': samples[min(len(samples) - 1, int(0.9 * len(samples)))], 'max': samples[-1],
+                'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0}
+
+    def _write(self):
+        shapes = sorted(set(self.samples) | set(self.errors))
+        data = {shape: dict(self.summary(shape), samples=self.samples.get(shape, [])) for shape in shapes}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,58 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class Checkpoint:
+    """
+    Progress of a worker, persisted in '<workdir>/checkpoint.json' so that a job resubmitted
+    after hitting its walltime can skip finished experiments and resume the ones in progress
+    from their saved statistics. The file is rewritten atomically after every run; experiments
+    running concurrently ('packexperiments') share it, so updates are serialized.
+    """
+    FILE_NAME = 'checkpoint.json'
+
+    def __init__(self, work_dir: str, resume: bool = False):
+        self.path = os.path.join(work_dir, self.FILE_NAME)
+        self.lock = threading.Lock()
+        self.state: Dict[str, Any] = {'finished': [], 'current': {}}
+        if resume and os.path.isfile(self.path):
+            with open(self.path, 'r') as f:
+                self.state = json.load(f)
+            # Checkpoints written before experiments could run concurrently hold a single experiment
+            current = self.state.get('current') or {}
+            if isinstance(current.get('name'), str):
+                current = {current['name']: current}
+            self.state['current'] = current
+
+    def _write(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def is_finished(self, exp_name: str) -> bool:
+        return exp_name in self.state['finished']
+
+    def finished(self) -> List[str]:
+        return list(self.state['finished'])
+
+    def mark_finished(self, exp_name: str):
+        with self.lock:
+            if exp_name not in self.state['finished']:
+                self.state['finished'].append(exp_name)
+            self.state['current'].pop(exp_name, None)
+            self._write()
+
+    def save_progress(self, exp_name: str, progress: Dict[str, Any]):
+        """Records the state of an experiment in progress (runs done, container statistics, sink offsets)."""
+        with self.lock:
+            self.state['current'][exp_name] = dict(progress, name=exp_name)
+            self._write()
+
+    def progress(self, exp_name: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.state['current'].get(exp_name)
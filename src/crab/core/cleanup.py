@@ -0,0 +1,123 @@
+import os
+import signal
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Interval between two scans while waiting for leftover processes and job steps to go away
+CLEANUP_POLL_INTERVAL = 0.1
+PR_SET_CHILD_SUBREAPER = 36
+
+
+def kill_group(proc, sig: signal.Signals = signal.SIGKILL):
+    """
+    Sends 'sig' to the whole process group of 'proc' (apps are started in their own session,
+    so this reaches the launcher and everything it spawned locally, even after it exited).
+    """
+    try:
+        os.killpg(proc.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+    except OSError:
+        # Not a group leader (started without start_new_session): fall back to the child only
+        if proc.poll() is None:
+            proc.send_signal(sig)
+
+
+def become_subreaper() -> bool:
+    """
+    Makes orphaned descendants of this process reparent to it instead of init (Linux only), so that
+    processes escaping their session (setsid, daemonizing launchers) are still found by scan_leaks.
+    """
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+def _read_stat(pid: int) -> Optional[Tuple[int, int, str]]:
+    """(ppid, session id, state) of 'pid' from /proc/<pid>/stat, or None if it is gone."""
+    try:
+        with open(f"/proc/{pid}/stat", 'rb') as f:
+            stat = f.read().decode(errors='replace')
+    except OSError:
+        return None
+    # The command name is in parentheses and may contain spaces: fields start after the last ')'
+    fields = stat[stat.rfind(')') + 2:].split()
+    return int(fields[1]), int(fields[3]), fields[0]
+
+
+def _read_cmdline(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", 'rb') as f:
+            return f.read().replace(b'\0', b' ').decode(errors='replace').strip()
+    except OSError:
+        return ""
+
+
+def scan_leaks(session_ids: Iterable[int], root_pid: Optional[int]) -> List[Dict[str, Any]]:
+    """
+    Lists the live processes left in the sessions of the apps, or descending from 'root_pid'
+    (the worker, None to check the sessions only), by scanning /proc. Zombies are ignored.
+    Returns [] where /proc is not available.
+    """
+    if not os.path.isdir("/proc"): return []
+    sessions = set(session_ids)
+    procs = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit(): continue
+        stat = _read_stat(int(entry))
+        if stat is not None:
+            procs[int(entry)] = stat
+
+    leaked = []
+    for pid, (ppid, sid, state) in procs.items():
+        if pid == root_pid or state == 'Z': continue
+        # Walk up the parents: orphans are reparented, so their session is checked too
+        ancestor, descendant = ppid, False
+        while root_pid is not None and ancestor in procs and ancestor > 1:
+            if ancestor == root_pid:
+                descendant = True
+                break
+            ancestor = procs[ancestor][0]
+        if sid in sessions or descendant:
+            leaked.append({'pid': pid, 'ppid': ppid, 'sid': sid, 'cmdline': _read_cmdline(pid)})
+    return leaked
+
+
+def wait_for_cleanup(session_ids: Iterable[int], wlmanager: Any, timeout: float,
+                     exclusive: bool = True) -> Dict[str, Any]:
+    """
+    Waits up to 'timeout' seconds for the processes of the apps to disappear and, if the workload
+    manager provides 'active_steps()', for its job steps to end. Every leftover process found is
+    sent SIGKILL. Returns {'processes': [...], 'steps': [...], 'alive': [...], 'wait': seconds}:
+    everything seen after teardown, and the pids and steps still alive when the wait ended.
+
+    With exclusive=False other experiments are running in the worker: their processes descend from
+    it too and their steps belong to the same job, so only the sessions of the apps are checked.
+    """
+    sessions = list(session_ids)
+    root_pid = os.getpid() if exclusive else None
+    check_steps = exclusive and hasattr(wlmanager, 'active_steps')
+    seen_procs: Dict[int, Dict[str, Any]] = {}
+    seen_steps: List[str] = []
+    start = time.monotonic()
+    while True:
+        processes = scan_leaks(sessions, root_pid)
+        steps = wlmanager.active_steps() if check_steps else []
+        for p in processes:
+            seen_procs.setdefault(p['pid'], p)
+            try: os.kill(p['pid'], signal.SIGKILL)
+            except OSError: pass
+        # Orphans reparented to us (see become_subreaper) are reaped here, nobody else waits on them
+        for pid in seen_procs:
+            try: os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError: pass
+        seen_steps.extend(s for s in steps if s not in seen_steps)
+        waited = time.monotonic() - start
+        if (not processes and not steps) or waited >= timeout:
+            return {'processes': list(seen_procs.values()), 'steps': seen_steps,
+                    'alive': [p['pid'] for p in processes] + steps, 'wait': round(waited, 3),
+                    'exclusive': exclusive}
+        time.sleep(CLEANUP_POLL_INTERVAL)
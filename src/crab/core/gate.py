@@ -0,0 +1,100 @@
+import selectors
+import socket
+import time
+from typing import Any, Dict, List
+
+# Extra time allowed to collect the acknowledgements after the release
+ACK_TIMEOUT = 5.0
+# Tick used to notice gated apps that died before checking in
+GATE_POLL_INTERVAL = 0.1
+
+
+class StartGate:
+    """
+    Start gate served by the engine over TCP. Gated apps are launched with '-gate <host>:<port>:<key>':
+    their main rank connects after the setup and sends 'READY <key>', then blocks. Once every gated
+    app of the run checked in (or died, or the timeout expired) the engine sends 'GO' to all of them
+    back to back; each answers 'ACK <CLOCK_REALTIME>' so the release skew across apps can be measured.
+    """
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('', 0))
+        self.sock.listen(128)
+        self.address = f"{socket.gethostname()}:{self.sock.getsockname()[1]}"
+
+    def spec(self, key: Any) -> str:
+        """Value of the '-gate' option for the app identified by 'key'."""
+        return f"{self.address}:{key}"
+
+    def release(self, procs: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Waits for the apps in 'procs' (key -> Popen) to check in and releases them at once.
+        Returns the keys released and missing, the wait (s), the release time (time.time()) and the
+        skew (s) between the first and the last acknowledgement, None with less than two.
+        """
+        conns: Dict[str, socket.socket] = {}
+        pending: Dict[socket.socket, bytes] = {}
+        start = time.monotonic()
+        with selectors.DefaultSelector() as sel:
+            sel.register(self.sock, selectors.EVENT_READ)
+            while len(conns) < len(procs):
+                # Do not wait for apps that died before checking in
+                if all(procs[key].poll() is not None for key in procs if key not in conns):
+                    break
+                remaining = timeout - (time.monotonic() - start)
+                if remaining <= 0: break
+                for sel_key, _ in sel.select(min(GATE_POLL_INTERVAL, remaining)):
+                    if sel_key.fileobj is self.sock:
+                        conn, _ = self.sock.accept()
+                        pending[conn] = b""
+                        sel.register(conn, selectors.EVENT_READ)
+                        continue
+                    conn = sel_key.fileobj
+                    chunk = conn.recv(256)
+                    pending[conn] += chunk
+                    if chunk and b"\n" not in pending[conn]: continue
+                    sel.unregister(conn)
+                    fields = pending.pop(conn).split()
+                    key = fields[1].decode() if len(fields) == 2 and fields[0] == b"READY" else None
+                    if key in procs and key not in conns:
+                        conns[key] = conn
+                    else:
+                        conn.close() # Not one of ours, or disconnected
+            for conn in pending:
+                conn.close()
+
+        released_at = time.time()
+        for conn in conns.values():
+            try: conn.sendall(b"GO\n")
+            except OSError: pass
+        wait = time.monotonic() - start
+
+        acks = self._read_acks(conns)
+        skew = max(acks.values()) - min(acks.values()) if len(acks) > 1 else None
+        return {'released': sorted(conns), 'missing': sorted(set(procs) - set(conns)), 'wait': wait,
+                'released_at': released_at, 'skew': skew,
+                'ack_delay': {key: t - released_at for key, t in acks.items()}}
+
+    def _read_acks(self, conns: Dict[str, socket.socket]) -> Dict[str, float]:
+        acks, data = {}, {key: b"" for key in conns}
+        deadline = time.monotonic() + ACK_TIMEOUT
+        with selectors.DefaultSelector() as sel:
+            for key, conn in conns.items():
+                sel.register(conn, selectors.EVENT_READ, key)
+            while sel.get_map() and time.monotonic() < deadline:
+                for sel_key, _ in sel.select(deadline - time.monotonic()):
+                    key = sel_key.data
+                    chunk = sel_key.fileobj.recv(256)
+                    data[key] += chunk
+                    if chunk and b"\n" not in data[key]: continue
+                    sel.unregister(sel_key.fileobj)
+                    fields = data[key].split()
+                    if len(fields) == 2 and fields[0] == b"ACK":
+                        acks[key] = float(fields[1])
+        for conn in conns.values():
+            conn.close()
+        return acks
+
+    def close(self):
+        self.sock.close()
@@ -0,0 +1,120 @@
+import re
+from typing import Dict, List, Tuple
+
+# <prefix><digits><suffix>, e.g. 'lrdn0042' or 'node12-ib'
+_NODE_RE = re.compile(r"^(.*?)(\d+)(\D*)$")
+
+
+def _split_top_level(hostlist: str) -> List[str]:
+    """Splits 'hostlist' on the commas that are not inside brackets."""
+    items, depth, start = [], 0, 0
+    for i, c in enumerate(hostlist):
+        if c == '[':
+            depth += 1
+        elif c == ']':
+            depth -= 1
+            if depth < 0: raise ValueError(f"Unbalanced ']' in hostlist '{hostlist}'")
+        elif c == ',' and depth == 0:
+            items.append(hostlist[start:i])
+            start = i + 1
+    if depth != 0: raise ValueError(f"Unbalanced '[' in hostlist '{hostlist}'")
+    items.append(hostlist[start:])
+    return [item.strip() for item in items if item.strip()]
+
+
+def _expand_ranges(ranges: str) -> List[str]:
+    """Expands the content of a bracket ('001-004,010') keeping the zero padding of each range."""
+    values = []
+    for r in ranges.split(','):
+        r = r.strip()
+        if '-' in r:
+            lo, hi = r.split('-', 1)
+            if int(hi) < int(lo): raise ValueError(f"Invalid range '{r}' in hostlist")
+            values.extend(f"{n:0{len(lo)}d}" for n in range(int(lo), int(hi) + 1))
+        elif r:
+            values.append(r)
+    return values
+
+
+def _expand_item(item: str) -> List[str]:
+    open_idx = item.find('[')
+    if open_idx < 0: return [item]
+    close_idx = item.index(']', open_idx)
+    prefix, rest = item[:open_idx], item[close_idx + 1:]
+    # Several brackets in the same name ('rack[1-2]n[01-04]') expand to their cartesian product
+    return [prefix + value + tail
+            for value in _expand_ranges(item[open_idx + 1:close_idx])
+            for tail in _expand_item(rest)]
+
+
+def expand_hostlist(hostlist: str) -> List[str]:
+    """
+    Expands a Slurm hostlist ('nid[001-004,010],lrdn[0001-0128]') into the list of node names,
+    in the same order as 'scontrol show hostnames'.
+    """
+    if not hostlist: return []
+    nodes = []
+    for item in _split_top_level(hostlist):
+        nodes.extend(_expand_item(item))
+    return nodes
+
+
+def _format_ranges(numbers: List[int], width: int) -> str:
+    numbers = sorted(set(numbers))
+    ranges, start, prev = [], numbers[0], numbers[0]
+    for n in numbers[1:] + [None]:
+        if n is not None and n == prev + 1:
+            prev = n
+            continue
+        lo, hi = f"{start:0{width}d}", f"{prev:0{width}d}"
+        ranges.append(lo if start == prev else f"{lo}-{hi}")
+        if n is not None: start = prev = n
+    return ','.join(ranges)
+
+
+def compress_hostlist(nodes: List[str]) -> str:
+    """
+    Compresses a list of node names into a Slurm hostlist, e.g. ['nid001', 'nid002', 'nid003', 'nid010']
+    -> 'nid[001-003,010]'. Names sharing prefix, suffix and zero padding are merged into one bracket;
+    names without a number are kept as they are.
+    """
+    parsed = []
+    padded_widths = set()
+    for node in nodes:
+        m = _NODE_RE.match(node)
+        if m is None:
+            parsed.append((node, None))
+            continue
+        prefix, digits, suffix = m.groups()
+        padded = len(digits) > 1 and digits.startswith('0')
+        if padded: padded_widths.add((prefix, suffix, len(digits)))
+        parsed.append((node, (prefix, suffix, digits, padded)))
+
+    # Groups keep the order in which they first appear; numbers are sorted inside each group
+    groups: Dict[Tuple[str, str, int], List[int]] = {}
+    order: List[Tuple] = []
+    for node, info in parsed:
+        if info is None:
+            if node not in order: order.append(node)
+            continue
+        prefix, suffix, digits, padded = info
+        # 'nid100' belongs with 'nid[001-099]'; unpadded names of other lengths share width 0
+        width = len(digits) if padded or (prefix, suffix, len(digits)) in padded_widths else 0
+        key = (prefix, suffix, width)
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append(int(digits))
+
+    items = []
+    for key in order:
+        if isinstance(key, str):
+            items.append(key)
+            continue
+        prefix, suffix, width = key
+        ranges = _format_ranges(groups[key], width)
+        if ',' in ranges or '-' in ranges:
+            items.append(f"{prefix}[{ranges}]{suffix}")
+        else:
+            items.append(f"{prefix}{ranges}{suffix}")
+    return ','.join(items)
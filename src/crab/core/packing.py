@@ -0,0 +1,45 @@
+import threading
+from typing import Dict, List, Optional
+
+
+class NodePacker:
+    """
+    Hands out disjoint slices of the allocation to experiments running concurrently in the worker
+    ('packexperiments'). An experiment gets the first free nodes, in allocation order, as many as
+    its demand; one with 'isolation' waits for the allocation to drain and runs alone, and no
+    later experiment starts before it.
+
+    Callers hold 'lock' across acquire/release and while deciding whether an experiment is alone.
+    """
+    def __init__(self, node_list: List[str]):
+        self.node_list = list(node_list)
+        self.free = list(node_list)
+        self.running: Dict[str, List[str]] = {}
+        self.isolated: Optional[str] = None
+        self.lock = threading.Lock()
+
+    def acquire(self, exp_name: str, demand: int, isolation: bool = False) -> Optional[List[str]]:
+        """Nodes for 'exp_name', or None if it cannot start now."""
+        if self.isolated is not None or demand > len(self.free):
+            return None
+        if isolation and self.running:
+            return None
+        nodes, self.free = self.free[:demand], self.free[demand:]
+        self.running[exp_name] = nodes
+        if isolation:
+            self.isolated = exp_name
+        return nodes
+
+    def release(self, exp_name: str):
+        released = set(self.running.pop(exp_name, []))
+        self.free = [n for n in self.node_list if n in released or n in self.free]
+        if self.isolated == exp_name:
+            self.isolated = None
+
+    def alone(self, exp_name: str) -> bool:
+        """True if 'exp_name' is the only experiment running."""
+        return list(self.running) == [exp_name]
+
+    def utilization(self) -> float:
+        """Fraction of the allocation given to running experiments."""
+        return 1.0 - len(self.free) / len(self.node_list) if self.node_list else 0.0
@@ -0,0 +1,115 @@
+"""
+Quiescence probe: waits until a node has settled after an experiment, i.e. its network counters
+(/proc/net/dev and, when present, the InfiniBand port counters) grow slower than a threshold and
+no more than a few tasks are runnable (/proc/loadavg).
+
+The worker runs it on every node of the allocation through the workload manager, as a script:
+    python quiesce.py --netrate <bytes/s> --runnable <tasks> --maxwait <s>
+which prints one JSON line with the result of its node.
+"""
+import argparse
+import glob
+import json
+import os
+import shlex
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+# Sampling period and number of consecutive quiet samples needed to declare a node quiet
+PROBE_INTERVAL = 0.1
+QUIET_SAMPLES = 3
+# Extra time given to the launcher (srun/mpirun) on top of the probe's own maximum wait
+LAUNCH_SLACK = 30.0
+
+
+def read_network_bytes() -> int:
+    """Bytes received + sent so far by every interface but loopback, including InfiniBand ports."""
+    total = 0
+    try:
+        with open("/proc/net/dev") as f:
+            for line in f.readlines()[2:]:
+                name, data = line.split(':', 1)
+                if name.strip() == 'lo': continue
+                fields = data.split()
+                total += int(fields[0]) + int(fields[8])
+    except OSError:
+        pass
+    # RDMA traffic bypasses the kernel stack: port_*_data count 4-byte words
+    for port in glob.glob("/sys/class/infiniband/*/ports/*/counters"):
+        for counter in ('port_xmit_data', 'port_rcv_data'):
+            try:
+                with open(os.path.join(port, counter)) as f:
+                    total += 4 * int(f.read())
+            except (OSError, ValueError):
+                pass
+    return total
+
+
+def read_runnable() -> int:
+    """Tasks currently runnable on the node, the caller excluded (4th field of /proc/loadavg)."""
+    try:
+        with open("/proc/loadavg") as f:
+            return max(0, int(f.read().split()[3].split('/')[0]) - 1)
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def probe(max_rate: float, max_runnable: int, max_wait: float) -> Dict[str, Any]:
+    """
+    Samples the counters every PROBE_INTERVAL seconds until QUIET_SAMPLES consecutive samples are
+    below 'max_rate' bytes/s and 'max_runnable' tasks, or 'max_wait' seconds have passed.
+    """
+    start = time.monotonic()
+    prev_bytes, prev_time = read_network_bytes(), start
+    streak, rate, runnable = 0, 0.0, 0
+    while True:
+        time.sleep(PROBE_INTERVAL)
+        now, curr_bytes = time.monotonic(), read_network_bytes()
+        rate = max(0, curr_bytes - prev_bytes) / (now - prev_time)
+        runnable = read_runnable()
+        prev_bytes, prev_time = curr_bytes, now
+        streak = streak + 1 if rate <= max_rate and runnable <= max_runnable else 0
+        if streak >= QUIET_SAMPLES or now - start >= max_wait:
+            return {'host': socket.gethostname(), 'quiet': streak >= QUIET_SAMPLES,
+                    'settle': round(now - start, 3), 'netrate': round(rate, 1), 'runnable': runnable}
+
+
+def probe_nodes(wlmanager: Any, node_list: List[str], max_rate: float, max_runnable: int,
+                max_wait: float) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Runs the probe on every node in 'node_list' (one task per node) through the workload manager.
+    Returns the result of every node and an error message, empty if the launch succeeded.
+    """
+    cmd = (f"{shlex.quote(sys.executable)} {shlex.quote(os.path.abspath(__file__))} "
+           f"--netrate {max_rate} --runnable {max_runnable} --maxwait {max_wait}")
+    try:
+        cmd_string = wlmanager.run_job(node_list, 1, cmd)
+        out = subprocess.run(shlex.split(cmd_string), capture_output=True, text=True,
+                             timeout=max_wait + LAUNCH_SLACK, start_new_session=True)
+    except Exception as e:
+        return [], str(e)
+    results = []
+    for line in out.stdout.splitlines():
+        try:
+            results.append(json.loads(line))
+        except ValueError:
+            continue
+    if out.returncode != 0 or not results:
+        return results, f"rc {out.returncode}: {out.stderr.strip()[-500:]}"
+    return results, ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Waits until the node is quiet (network and runnable tasks).")
+    parser.add_argument("--netrate", type=float, required=True, help="Max network traffic (bytes/s).")
+    parser.add_argument("--runnable", type=int, required=True, help="Max runnable tasks, the probe excluded.")
+    parser.add_argument("--maxwait", type=float, required=True, help="Max seconds to wait.")
+    args = parser.parse_args()
+    print(json.dumps(probe(args.netrate, args.runnable, args.maxwait)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
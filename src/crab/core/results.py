@@ -0,0 +1,156 @@
+import glob
+import os
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas
+
+# Columnar output formats -> file extension of their part files
+COLUMNAR_FORMATS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("outformat 'parquet'/'arrow' requires pyarrow (pip install pyarrow).")
+    return pyarrow
+
+
+def write_columnar(path: str, out_format: str, run_ids, msg_size: int, columns: Dict[str, np.ndarray]):
+    """
+    Writes one typed, compressed table to 'path': run_id (int32), msg_size (int64) and one column per
+    metric in its storage dtype. Columns shorter than run_ids are padded with nulls.
+    The file is written under a hidden temporary name and renamed, so readers never see a partial file.
+    """
+    pa = _import_pyarrow()
+    n = len(run_ids)
+    arrays = {
+        'run_id': pa.array(np.asarray(run_ids, dtype=np.int32)),
+        'msg_size': pa.array(np.full(n, msg_size, dtype=np.int64)),
+    }
+    for name, values in columns.items():
+        values = np.asarray(values)
+        padded = np.zeros(n, dtype=values.dtype)
+        padded[:len(values)] = values[:n]
+        arrays[name] = pa.array(padded, mask=np.arange(n) >= len(values))
+    table = pa.table(arrays)
+
+    tmp_path = os.path.join(os.path.dirname(path), '.' + os.path.basename(path) + '.tmp')
+    if out_format == 'parquet':
+        pa.parquet.write_table(table, tmp_path, compression='zstd')
+    else:
+        pa.feather.write_feather(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+
+class CSVResultSink:
+    """
+    Streams the samples of every run to disk as soon as they are collected.
+
+    Produces the same 'data_app_<id>.csv' layout as log_data (run_id, msg_size, one column
+    per metric), but appends one block of rows per run and fsyncs it, so a job killed
+    mid-experiment loses at most the run in progress and no sample has to stay in memory.
+    """
+    def __init__(self, path_prefix: str):
+        self.path_prefix = path_prefix
+        self._files: Dict[int, Any] = {}
+        self._offsets: Dict[str, int] = {}
+
+    def _open(self, app_id: int):
+        if app_id not in self._files:
+            path = f"{self.path_prefix}_app_{app_id}.csv"
+            write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+            self._files[app_id] = (open(path, 'a'), write_header)
+        return self._files[app_id]
+
+    def write_run(self, app_id: int, run_id: int, containers: List[Any], series: List[np.ndarray]):
+        """Appends the samples collected for one app and message size in one run, one column per container."""
+        if not any(len(s) for s in series): return
+
+        columns = {c.get_title(): pandas.Series(s, dtype=s.dtype) for c, s in zip(containers, series)}
+        dataframe = pandas.DataFrame(columns)
+        dataframe.insert(0, 'run_id', run_id)
+        dataframe.insert(1, 'msg_size', containers[0].msg_size)
+
+        f, write_header = self._open(app_id)
+        dataframe.to_csv(f, header=write_header, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+        self._files[app_id] = (f, False)
+        self._offsets[str(app_id)] = f.tell()
+
+    def snapshot(self) -> Dict[str, int]:
+        """Length of every file written so far (by app id), to be stored in a checkpoint."""
+        return dict(self._offsets)
+
+    def restore(self, snapshot: Dict[str, int]):
+        """Truncates the files back to a snapshot, dropping the rows of runs that did not complete."""
+        self.close()
+        self._offsets = dict(snapshot)
+        for path in glob.glob(f"{glob.escape(self.path_prefix)}_app_*.csv"):
+            app_id = re.search(r"_app_(\d+)\.csv$", path).group(1)
+            with open(path, 'r+') as f:
+                f.truncate(self._offsets.get(app_id, 0))
+
+    def close(self):
+        for f, _ in self._files.values():
+            f.close()
+        self._files = {}
+
+
+class ColumnarResultSink:
+    """
+    Streams the samples of every run into a Parquet or Arrow IPC dataset, partitioned by app:
+    '<dataset_dir>/app_id=<id>/run-<run>-<msg_size>.<ext>'. Each run is an immutable part file, so the
+    dataset is readable (and crash-safe) at any point, and a whole campaign loads in one read
+    with pyarrow.dataset / pandas.read_parquet.
+    """
+    def __init__(self, dataset_dir: str, out_format: str):
+        _import_pyarrow()
+        self.dataset_dir = dataset_dir
+        self.out_format = out_format
+        self._last_run: Dict[str, int] = {}
+
+    def write_run(self, app_id: int, run_id: int, containers: List[Any], series: List[np.ndarray]):
+        """Writes the samples collected for one app and message size in one run as a new part file."""
+        num_rows = max((len(s) for s in series), default=0)
+        if num_rows == 0: return
+
+        app_dir = os.path.join(self.dataset_dir, f"app_id={app_id}")
+        os.makedirs(app_dir, exist_ok=True)
+        path = os.path.join(app_dir, f"run-{run_id:06d}-{containers[0].msg_size}.{COLUMNAR_FORMATS[self.out_format]}")
+        columns = {c.get_column(): s for c, s in zip(containers, series)}
+        write_columnar(path, self.out_format, np.full(num_rows, run_id), containers[0].msg_size, columns)
+        self._last_run[str(app_id)] = run_id
+
+    def snapshot(self) -> Dict[str, int]:
+        """Last run written for every app, to be stored in a checkpoint."""
+        return dict(self._last_run)
+
+    def restore(self, snapshot: Dict[str, int]):
+        """Removes the part files of runs newer than the snapshot, and any partially written file."""
+        self._last_run = dict(snapshot)
+        for path in glob.glob(os.path.join(glob.escape(self.dataset_dir), "app_id=*", ".*.tmp")):
+            os.remove(path)
+        for path in glob.glob(os.path.join(glob.escape(self.dataset_dir), "app_id=*", "run-*")):
+            app_id = re.search(r"app_id=(\d+)", path).group(1)
+            run_id = int(re.search(r"run-(\d+)-", os.path.basename(path)).group(1))
+            if run_id > self._last_run.get(app_id, 0):
+                os.remove(path)
+
+    def close(self):
+        pass
+
+
+def make_sink(out_format: str, exp_dir: str):
+    """Returns the streaming sink for 'out_format', or None if the format is written at the end only."""
+    prefix = os.path.join(exp_dir, 'data')
+    if out_format == 'csv':
+        return CSVResultSink(prefix)
+    if out_format in COLUMNAR_FORMATS:
+        return ColumnarResultSink(prefix, out_format)
+    return None
@@ -0,0 +1,1242 @@
+import subprocess
+import numpy as np
+import scipy.stats as st
+import math
+import time
+import importlib.util
+import pathlib
+import sys
+import os
+import pandas
+import shlex
+import signal
+import threading
+import json
+from typing import List, Dict, Any, Callable, Optional
+
+from .scheduler import EventScheduler
+from .results import COLUMNAR_FORMATS, make_sink, write_columnar
+from .checkpoint import Checkpoint
+from .budget import TimeBudget
+from .cleanup import kill_group, wait_for_cleanup
+from .quiesce import probe, probe_nodes
+from .trace import Tracer
+from .gate import StartGate
+from .calibration import LaunchCalibration
+
+# =============================================================================
+# 1. DATA CONTAINERS & UTILITIES
+# =============================================================================
+
+class DataContainer:
+    """
+    Holds runtime metrics for a specific application.
+    Samples are stored in a growable NumPy buffer ('float64', or 'float32' for metrics where
+    7 significant digits are enough); 'data' is a zero-copy view over the stored samples.
+    With retain=False only the running statistics are kept (samples are streamed to disk).
+    Containers with convergent=False (timestamps, overlap labels) are never convergence targets,
+    not even with 'convergeall'.
+    """
+    def __init__(self, app_id: int, conv_goal: bool, label: str, unit: str, msg_size: int = 0,
+                 dtype: str = 'float64', retain: bool = True, convergent: bool = True):
+        self.app_id = app_id
+        self.conv_run = 0
+        self.label = label
+        self.unit = unit
+        self.conv_goal = conv_goal and convergent
+        self.convergent = convergent
+        self.converged = False
+        self.num_samples = []
+        self.msg_size = msg_size
+        self.retain = retain
+        self._buf = np.empty(0, dtype=np.dtype(dtype))
+        self._size = 0
+        # Running statistics (Welford/Chan), so convergence checks never rescan self.data
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._buf[:self._size]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._buf.dtype
+
+    def _append(self, batch: np.ndarray):
+        end = self._size + batch.size
+        if end > self._buf.size:
+            # Geometric growth keeps appends amortized O(batch)
+            grown = np.empty(max(end, 2 * self._buf.size, 1024), dtype=self._buf.dtype)
+            grown[:self._size] = self._buf[:self._size]
+            self._buf = grown
+        self._buf[self._size:end] = batch
+        self._size = end
+
+    def add_samples(self, series: List[float]):
+        """Appends the samples of one run and merges them into the running statistics in O(len(series))."""
+        batch = np.asarray(series, dtype=np.float64)
+        self.num_samples.append(batch.size)
+        if batch.size == 0: return
+        if self.retain: self._append(batch)
+
+        b_count = batch.size
+        b_mean = float(batch.mean())
+        b_m2 = float(((batch - b_mean) ** 2).sum())
+
+        total = self.count + b_count
+        delta = b_mean - self.mean
+        self.mean += delta * b_count / total
+        self.m2 += b_m2 + delta * delta * self.count * b_count / total
+        self.count = total
+
+    def get_state(self) -> Dict[str, Any]:
+        """Serializable convergence state (running statistics, samples per run), for checkpoints."""
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2, 'num_samples': self.num_samples,
+                'converged': self.converged, 'conv_run': self.conv_run}
+
+    def set_state(self, state: Dict[str, Any]):
+        self.count = state['count']
+        self.mean = state['mean']
+        self.m2 = state['m2']
+        self.num_samples = list(state['num_samples'])
+        self.converged = state['converged']
+        self.conv_run = state['conv_run']
+
+    def sem(self) -> float:
+        """Standard error of the mean (ddof=1), as scipy.stats.sem."""
+        if self.count <= 1: return float('nan')
+        return math.sqrt(self.m2 / (self.count - 1)) / math.sqrt(self.count)
+
+    def get_title(self) -> str:
+        return f"{self.app_id}_{self.label}_{self.unit}"
+
+    def get_column(self) -> str:
+        """Column name in columnar outputs, where app_id is a partition key rather than a prefix."""
+        return f"{self.label}_{self.unit}"
+
+    def md_to_list(self) -> List[Any]:
+        return [self.app_id, self.label, self.unit, self.conv_goal, self.converged, self.conv_run, self.msg_size] + self.num_samples
+
+def check_CI(container_list: List[DataContainer], alpha: float, beta: float, converge_all: bool, run: int) -> bool:
+    """Checks statistical convergence based on Confidence Intervals (CI)."""
+    for container in container_list:
+        if (not container.converged) and container.convergent and (converge_all or container.conv_goal):
+            n = container.count
+            if n <= 1: continue 
+            
+            mean = container.mean
+            sem = container.sem()
+            
+            if sem == 0:
+                container.converged = True
+                container.conv_run = run
+                continue
+            
+            CI_lb, CI_ub = st.t.interval(1 - alpha, n - 1, loc=mean, scale=sem)
+            if (CI_ub - CI_lb) < beta * mean:
+                container.converged = True
+                container.conv_run = run
+
+    check = True
+    for container in container_list:
+        if container.convergent and (converge_all or container.conv_goal):
+            check = check and container.converged
+    return check
+
+def predict_runs(container_list: List[DataContainer], alpha: float, beta: float, converge_all: bool,
+                 run: int) -> Optional[int]:
+    """
+    Estimates the total number of runs after which check_CI would pass, assuming the variance and the
+    samples per run of every container still to converge stay as observed so far: for each, the smallest
+    n with 2 * t(1 - alpha/2, n - 1) * s / sqrt(n) < beta * mean (fixed-point iteration on the t quantile),
+    divided by its samples per run. None if a container has no estimate yet (under 2 samples, zero mean).
+    """
+    total = run
+    for container in container_list:
+        if container.converged or not (container.convergent and (converge_all or container.conv_goal)): continue
+        if container.count <= 1 or container.mean == 0: return None
+        sd = math.sqrt(container.m2 / (container.count - 1))
+        target = beta * abs(container.mean)
+        n = container.count
+        for _ in range(20):
+            t = st.t.ppf(1 - alpha / 2, n - 1)
+            needed = max(2, math.ceil((2 * t * sd / target) ** 2))
+            if needed == n: break
+            n = needed
+        per_run = container.count / len(container.num_samples)
+        total = max(total, math.ceil(n / per_run))
+    return total
+
+# Process-wide registry of workload-manager and wrapper modules, keyed by (resolved path, mtime)
+_MODULE_CACHE: Dict[Any, Any] = {}
+_MODULE_CACHE_LOCK = threading.Lock()
+
+def _dedup_sys_path():
+    """Drops repeated sys.path entries (wrappers append CRAB_ROOT/wrappers on every import)."""
+    seen = set()
+    sys.path[:] = [p for p in sys.path if not (p in seen or seen.add(p))]
+
+def load_module(path: str):
+    """
+    Loads a module from a file path once per process and returns the shared instance.
+    A module is reloaded only if its file changed on disk. Returns (module, cache_hit).
+    """
+    resolved = str(pathlib.Path(path).resolve())
+    key = (resolved, os.path.getmtime(resolved))
+    with _MODULE_CACHE_LOCK:
+        if key in _MODULE_CACHE:
+            return _MODULE_CACHE[key], True
+        name = pathlib.Path(resolved).stem
+        spec = importlib.util.spec_from_file_location(name, resolved)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        _dedup_sys_path()
+        _MODULE_CACHE[key] = mod
+        return mod, False
+
+def run_job(job, wlmanager, ppn: int, pre_commands: List[str] = None):
+    """launches an application process via the workload manager."""
+    if not job.node_list:
+        raise Exception(f"Application {job.id_num} has 0 allocated nodes.")
+    
+    # Passa pre_commands al workload manager
+    cmd_string = wlmanager.run_job(job.node_list, ppn, job.run_app(), pre_commands=pre_commands)
+    
+    if not cmd_string:
+        cmd_string = "echo a > /dev/null"
+        raise Exception
+    
+    cmd = shlex.split(cmd_string)
+    # Own session (and process group): the whole tree under the launcher can be killed at once
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=False,
+                               start_new_session=True)
+    job.launch_time = time.time() # Same clock as the -timestamps column of the blink benchmarks
+    job.set_process(process)
+
+def parse_signal(value) -> signal.Signals:
+    """Signal from a name ('SIGUSR1', 'USR1', 'term') or a number."""
+    if str(value).isdigit():
+        return signal.Signals(int(value))
+    name = str(value).upper()
+    return signal.Signals[name if name.startswith('SIG') else 'SIG' + name]
+
+def end_job(job, sig: Optional[signal.Signals] = None, grace: float = 0.0):
+    """
+    Terminates a job and retrieves output. With 'sig' and a grace period the job is first sent
+    'sig' (forwarded by srun/mpirun to the ranks, which can dump their results) and only
+    killed if it is still running after 'grace' seconds. The kill reaches its whole process group.
+    """
+    if hasattr(job, 'process') and job.process:
+        if sig is not None and grace > 0:
+            job.process.send_signal(sig)
+            try:
+                out, err = job.process.communicate(timeout=grace)
+                job.set_output(out, err)
+                return
+            except subprocess.TimeoutExpired:
+                pass
+        kill_group(job.process)
+        out, err = job.process.communicate()
+        job.set_output(out, err)
+
+def wait_timed(job, timeout_sec: float) -> bool:
+    """Waits for a job with a timeout. Returns True if timed out."""
+    try:
+        out, err = job.process.communicate(timeout=timeout_sec)
+        job.set_output(out, err)
+        return False
+    except subprocess.TimeoutExpired:
+        end_job(job)
+        return True
+
+def log_data(out_format: str, path_prefix: str, data_containers: List[DataContainer]):
+    """Aggregates and saves data to CSV, HDF, Parquet or Arrow."""
+    apps_data = {}
+    for container in data_containers:
+        apps_data.setdefault(container.app_id, {}).setdefault(container.msg_size, []).append(container)
+
+    for app_id, sizes_data in apps_data.items():
+        # One block of rows per message size (several when the app sweeps sizes in one launch)
+        size_frames = []
+        for msg_size, containers in sizes_data.items():
+            all_metrics = []
+            for container in containers:
+                values = container.data
+                if not values.size or not container.num_samples: continue
+
+                # Reconstruct run_id column
+                run_ids = np.repeat(np.arange(1, len(container.num_samples) + 1), container.num_samples)
+
+                # Truncate mismatch
+                min_len = min(len(run_ids), len(values))
+                df = pandas.DataFrame({'run_id': run_ids[:min_len], container.get_title(): values[:min_len]})
+                df = df.set_index(['run_id', df.groupby('run_id').cumcount()])
+                all_metrics.append(df)
+
+            if not all_metrics: continue
+
+            dataframe = pandas.concat(all_metrics, axis=1).reset_index()
+            if 'level_1' in dataframe.columns: dataframe = dataframe.drop(columns=['level_1'])
+            dataframe.insert(1, "msg_size", msg_size)
+            size_frames.append((msg_size, containers, dataframe))
+
+        if not size_frames: continue
+
+        file_name = f"{path_prefix}_app_{app_id}"
+        if out_format == 'csv':
+            pandas.concat([df for _, _, df in size_frames], ignore_index=True).to_csv(f"{file_name}.csv", index=False)
+        elif out_format == 'hdf':
+            pandas.concat([df for _, _, df in size_frames], ignore_index=True).to_hdf(f"{file_name}.h5", key='df', index=False)
+        elif out_format in COLUMNAR_FORMATS:
+            # Same layout as the streaming sink: one dataset partitioned by app_id, one part per message size
+            app_dir = os.path.join(path_prefix, f"app_id={app_id}")
+            os.makedirs(app_dir, exist_ok=True)
+            for part, (msg_size, containers, dataframe) in enumerate(size_frames):
+                columns = {c.get_column(): dataframe[c.get_title()].to_numpy() for c in containers if c.get_title() in dataframe}
+                write_columnar(os.path.join(app_dir, f"part-{part}.{COLUMNAR_FORMATS[out_format]}"), out_format,
+                               dataframe['run_id'].to_numpy(), msg_size, columns)
+
+def app_msg_sizes(app) -> List[int]:
+    """Message sizes measured by one launch of 'app' (0 if the app has no -msgsize argument)."""
+    if hasattr(app, 'get_msg_sizes'):
+        sizes = app.get_msg_sizes()
+        if sizes: return list(dict.fromkeys(sizes))
+    msg_size = 0
+    tokens = str(app.args).split()
+    if "-msgsize" in tokens:
+        try:
+            msg_size = int(tokens[tokens.index("-msgsize")+1])
+        except: pass
+    return [msg_size]
+
+# =============================================================================
+# 2. NODE ALLOCATOR LOGIC
+# =============================================================================
+
+class NodeAllocator:
+    """Encapsulates all strategies for mapping nodes to applications."""
+
+    @staticmethod
+    def allocate(apps: List[Any], node_list: List[str], options: Dict[str, Any]):
+        """Allocates the nodes with the strategy selected by 'allocationmode'."""
+        mode = options.get('allocationmode', 'l')
+        if mode == 'p':
+            NodeAllocator.allocate_partitioned(apps, node_list, options)
+        elif mode == 'i':
+            split = NodeAllocator.get_abs_split(options.get('allocationsplit', 'e'), len(apps), len(node_list))
+            NodeAllocator.allocate_interleaved(apps, node_list, split)
+        else: # linear
+            split = NodeAllocator.get_abs_split(options.get('allocationsplit', 'e'), len(apps), len(node_list))
+            NodeAllocator.allocate_linear(apps, node_list, split)
+
+    @staticmethod
+    def get_abs_split(split_str: str, num_apps: int, num_nodes: int) -> List[int]:
+        """Calculates absolute node counts based on percentage or equal split."""
+        if split_str == 'e':
+            split_list = [100.0 / num_apps] * num_apps
+        else:
+            split_list = [float(x) for x in split_str.split(':')]
+
+        if sum(split_list) > 100.1: # float tolerance
+            raise Exception("Splits percentages exceed 100.")
+        
+        split_list = split_list[:num_apps]
+        split_absolute = []
+        for split in split_list[:-1]:
+            split_absolute.append(int(math.ceil(num_nodes * split / 100)))
+        
+        if num_apps == 1:
+            split_absolute = [int(math.ceil(num_nodes * split_list[0] / 100))]
+        else:
+            split_absolute.append(num_nodes - sum(split_absolute))
+            
+        return split_absolute
+
+    @staticmethod
+    def allocate_linear(apps: List[Any], node_list: List[str], split_counts: List[int]):
+        """Allocates contiguous blocks of nodes to applications."""
+        idx = 0
+        for app, count in zip(apps, split_counts):
+            app.set_nodes(node_list[idx : idx + count])
+            idx += count
+
+    @staticmethod
+    def allocate_interleaved(apps: List[Any], node_list: List[str], split_counts: List[int]):
+        """Allocates nodes in a round-robin fashion."""
+        num_apps = len(apps)
+        alloc_lists = [[] for _ in range(num_apps)]
+        counts_copy = list(split_counts)
+        
+        app_idx = 0
+        node_idx = 0
+        
+        # While there are nodes to assign and demand exists
+        while any(counts_copy) and node_idx < len(node_list):
+            if counts_copy[app_idx] > 0:
+                alloc_lists[app_idx].append(node_list[node_idx])
+                counts_copy[app_idx] -= 1
+                node_idx += 1
+            app_idx = (app_idx + 1) % num_apps
+
+        for app, a_list in zip(apps, alloc_lists):
+            app.set_nodes(a_list)
+
+    @staticmethod
+    def allocate_partitioned(apps: List[Any], node_list: List[str], options: Dict[str, Any]):
+        """
+        Advanced allocation: divides nodes into partitions (Victim/Aggressor) 
+        and applies sub-rules (Shared vs Dedicated) within partitions.
+        """
+        num_nodes = len(node_list)
+        partition_split = options.get('partitionsplit', '100')
+        layout = options.get('partitionlayout', 'l')
+        local_rules = [x.strip() for x in options.get('allocationsplit', 'e').split('-')]
+
+        # 1. Determine Partition Sizes
+        if partition_split == 'e':
+            # Auto-detect based on app partition_ids
+            used_ids = set(getattr(a, 'partition_id', 0) for a in apps)
+            max_p = max(used_ids) + 1 if used_ids else 1
+            pt_counts = [int(math.ceil(num_nodes / max_p)) for _ in range(max_p)]
+            # Adjust remainder
+            diff = sum(pt_counts) - num_nodes
+            if diff != 0: pt_counts[-1] -= diff
+        else:
+            percs = [float(x) for x in partition_split.split(':')]
+            pt_counts = [int(math.ceil(num_nodes * p / 100)) for p in percs[:-1]]
+            pt_counts.append(num_nodes - sum(pt_counts))
+
+        # 2. Assign nodes to Partitions (Linear vs Interleaved)
+        partitions_nodes = [[] for _ in range(len(pt_counts))]
+        
+        if layout == 'i':
+            node_idx = 0
+            while node_idx < num_nodes:
+                for p_idx in range(len(pt_counts)):
+                    if len(partitions_nodes[p_idx]) < pt_counts[p_idx]:
+                        partitions_nodes[p_idx].append(node_list[node_idx])
+                        node_idx += 1
+                        if node_idx >= num_nodes: break
+        else:
+            idx = 0
+            for p_idx, count in enumerate(pt_counts):
+                partitions_nodes[p_idx] = node_list[idx : idx + count]
+                idx += count
+
+        # 3. Apply Local Rules to Apps in each Partition
+        if len(local_rules) == 1 and len(partitions_nodes) > 1:
+            local_rules = local_rules * len(partitions_nodes)
+
+        for p_id, (p_nodes, p_rule) in enumerate(zip(partitions_nodes, local_rules)):
+            p_apps = [a for a in apps if getattr(a, 'partition_id', 0) == p_id]
+            if not p_apps: continue
+
+            # Shared Mode ('100' or single app 'e')
+            if p_rule == '100' or (p_rule == 'e' and len(p_apps) <= 1):
+                for app in p_apps:
+                    app.set_nodes(p_nodes)
+            else:
+                # Space Sharing within partition
+                sub_split = NodeAllocator.get_abs_split(p_rule, len(p_apps), len(p_nodes))
+                NodeAllocator.allocate_linear(p_apps, p_nodes, sub_split)
+
+def partition_of(details: Dict[str, Any]) -> int:
+    """Partition of an app: its 'partition' entry, else 0 for apps collecting data and 1 for the others."""
+    manual_partition = details.get("partition")
+    return int(manual_partition) if manual_partition is not None else (0 if details.get("collect", False) else 1)
+
+def allocation_base(config: Dict[str, Any], node_list: List[str]) -> List[str]:
+    """Nodes an experiment is allocated on: the first 'nodes' of the allocation if it declares them, else all."""
+    if config.get('nodes') is None:
+        return node_list
+    demand = int(config['nodes'])
+    if not 0 < demand <= len(node_list):
+        raise ValueError(f"Experiment asks for {demand} nodes, the allocation has {len(node_list)}.")
+    return node_list[:demand]
+
+def used_nodes(apps: List[Any]) -> List[str]:
+    """Distinct nodes given to the apps, in order of first use."""
+    return list(dict.fromkeys(n for app in apps for n in app.node_list))
+
+class _AppSlot:
+    """Stand-in for an app when only the nodes it would get matter."""
+    def __init__(self, partition_id: int):
+        self.partition_id = partition_id
+        self.node_list = []
+
+    def set_nodes(self, node_list: List[str]):
+        self.node_list = node_list
+
+def experiment_footprint(config: Dict[str, Any], global_options: Dict[str, Any], node_list: List[str]) -> List[str]:
+    """
+    Nodes of 'node_list' the experiment uses, computed as its setup would (declared 'nodes', allocation
+    mode and splits) without loading the wrappers. Its length is the node demand of the experiment.
+    """
+    app_configs = config.get("apps", {})
+    sorted_keys = sorted(app_configs.keys(), key=lambda x: int(x) if x.isdigit() else x)
+    slots = [_AppSlot(partition_of(app_configs[key])) for key in sorted_keys if app_configs[key].get("path")]
+    NodeAllocator.allocate(slots, allocation_base(config, node_list), global_options.copy())
+    return used_nodes(slots)
+
+# =============================================================================
+# 3. EXPERIMENT RUNNER (Context for a single experiment)
+# =============================================================================
+
+class ExperimentRunner:
+    """
+    Manages the lifecycle of a single experiment within the job.
+    Isolates setup, execution, and teardown.
+    """
+    def __init__(self, exp_name: str, config: Dict[str, Any], global_options: Dict[str, Any], 
+                 node_list: List[str], output_dir: str, log_fn: Callable, checkpoint: Optional[Checkpoint] = None,
+                 budget: Optional[TimeBudget] = None, calibration: Optional[LaunchCalibration] = None,
+                 node_slice: Optional[List[str]] = None):
+        self.name = exp_name
+        self.config = config
+        self.global_opts = global_options
+        self.node_list = node_list
+        # Nodes the experiment runs on when it shares the allocation with others ('packexperiments')
+        self.node_slice = node_slice
+        self.log = log_fn
+        self.checkpoint = checkpoint
+        self.budget = budget
+        self.calibration = calibration
+        self.stopped_by_budget = False
+        # Run-count prediction ('predictpolicy'): experiments that cannot converge in time are abandoned or deferred
+        self.predicted_runs: Optional[int] = None
+        self.abandoned = False
+        self.deferred = False # Stopped for now, to be continued after the other experiments
+        self.deprioritized = False # Already deferred once, never deferred again
+        self.keep_alive = False # The worker keeps the runner to continue it ('interleave'), else it resumes from the checkpoint
+        
+        # Paths
+        self.exp_dir = os.path.join(output_dir, self.name)
+        os.makedirs(self.exp_dir, exist_ok=True)
+        
+        # State
+        self.apps = []
+        self.wlmanager = None
+        self.data_containers = []
+        self.app_containers = {}
+        self.sink = None
+        self.ppn = int(global_options.get('ppn', 1))
+        self.sessions = set() # Session ids of every app launched, to find leftover processes
+        self.overlap_targets: Dict[int, List[int]] = {} # App with timestamps -> apps its samples are labelled against
+        # Opt-in event trace ('trace': true), written to '<exp_dir>/trace.json' at the end of the experiment
+        self.tracer = Tracer(str(global_options.get('trace', False)).lower() in ('true', '1', 'yes'), exp_name)
+        self.gate: Optional[StartGate] = None
+        self.overhead_warned = set() # Apps already warned about a large launch overhead
+        self.metadata: Dict[str, Any] = {}
+
+    def setup(self):
+        """Loads apps, workload manager, and calculates node layout."""
+        self.log(f"[{self.name}] Setting up...")
+        setup_start = time.perf_counter()
+        trace_start = self.tracer.now()
+        cache_hits = 0
+        
+        # 1. Load Applications
+        self.apps = []
+        app_configs = self.config.get("apps", {})
+        sorted_keys = sorted(app_configs.keys(), key=lambda x: int(x) if x.isdigit() else x)
+        
+        # Dependency tracking
+        dependency_map = {}
+        static_schedule = []
+        
+        # WLM Loading
+        wlm_name = os.environ.get("CRAB_WL_MANAGER", "slurm") # default
+        wlm_path = f"./src/crab/core/wl_manager/{wlm_name}.py"
+        mod_wlm, hit = load_module(wlm_path)
+        cache_hits += hit
+        self.wlmanager = mod_wlm.wl_manager()
+
+        # App Instantiation
+        idx_counter = 0
+        for key in sorted_keys:
+            details = app_configs[key]
+            path = details.get("path")
+            if not path: continue
+
+            # Controlla la ENV CRAB_WRAPPERS_PATH
+            if not os.path.isabs(path) and "CRAB_WRAPPERS_PATH" in os.environ:
+                path = os.path.join(os.environ["CRAB_WRAPPERS_PATH"], path)
+            
+            if not os.path.exists(path):
+                 self.log(f"[ERROR] Wrapper not found at: {path}")
+                 raise FileNotFoundError(f"Wrapper not found: {path}")
+
+            # Load App Class
+            mod_app, hit = load_module(path)
+            cache_hits += hit
+            args = details.get("args", "")
+            collect = details.get("collect", False)
+            
+            app_instance = mod_app.app(idx_counter, collect, args)
+            self.tracer.name_lane(idx_counter + 1, f"app {idx_counter} ({os.path.basename(path)})")
+            
+            # Timing & Partition Metadata
+            start_val = str(details.get("start", "0"))
+            app_instance.partition_id = partition_of(details)
+            app_instance.start_string = start_val
+            app_instance.config_end = details.get("end", "")
+            
+            self.apps.append(app_instance)
+            idx_counter += 1
+
+        # 2. Allocate Nodes
+        # Merge experiment specific overrides into options for allocator
+        alloc_options = self.global_opts.copy()
+        # (Future: allow experiment config to override global_opts for splitting)
+        base = allocation_base(self.config, self.node_list)
+        NodeAllocator.allocate(self.apps, base, alloc_options)
+
+        # Sharing the allocation: the nodes used are mapped, in order, onto the slice given by the worker
+        if self.node_slice is not None:
+            mapping = dict(zip(used_nodes(self.apps), self.node_slice))
+            for app in self.apps:
+                app.set_nodes([mapping[n] for n in app.node_list])
+            self.node_list = self.node_slice
+
+        # 3. Initialize Data Containers
+        # Results are streamed to disk run by run unless 'streamresults' is disabled (HDF is written at the end)
+        out_fmt = self.global_opts.get('outformat', 'csv')
+        if str(self.global_opts.get('streamresults', True)).lower() not in ('false', '0', 'no'):
+            self.sink = make_sink(out_fmt, self.exp_dir)
+        stream = self.sink is not None
+
+        # Apps starting together block on a start gate served by the engine ('startgate')
+        if str(self.global_opts.get('startgate', False)).lower() in ('true', '1', 'yes'):
+            self.gate = StartGate()
+
+        # Wrappers that support it write their samples as a binary file in the experiment directory
+        binary = str(self.global_opts.get('binaryresults', False)).lower() in ('true', '1', 'yes')
+        for app in self.apps:
+            app.exp_dir = self.exp_dir
+            app.binary_results = binary
+            if app.collect_flag:
+                # One set of containers per message size measured by the app
+                self.app_containers[app.id_num] = {}
+                # Samples with a timestamp are labelled as overlapped or not with every other app
+                if any(meta["name"] == 'Timestamp' for meta in app.metadata):
+                    self.overlap_targets[app.id_num] = [other.id_num for other in self.apps if other is not app]
+                for msg_size in app_msg_sizes(app):
+                    # Timestamps and overlap labels describe the samples, they are not metrics to converge
+                    containers = [
+                        DataContainer(app.id_num, meta["conv"], meta["name"], meta["unit"], msg_size,
+                                      meta.get("dtype", "float64"), retain=not stream,
+                                      convergent=meta["name"] != 'Timestamp')
+                        for meta in app.metadata
+                    ]
+                    containers += [
+                        DataContainer(app.id_num, False, f"Overlap-App{other}", "bool", msg_size, 'float32',
+                                      retain=not stream, convergent=False)
+                        for other in self.overlap_targets.get(app.id_num, [])
+                    ]
+                    self.app_containers[app.id_num][msg_size] = containers
+                    self.data_containers.extend(containers)
+
+        num_modules = len(self.apps) + 1
+        self.tracer.complete("setup", trace_start, modules=num_modules, cache_hits=cache_hits)
+        self.log(f"[{self.name}] Setup done in {(time.perf_counter() - setup_start) * 1000:.1f} ms "
+                 f"({num_modules - cache_hits} modules loaded, {cache_hits} from cache).")
+
+    def calibrate_launch(self):
+        """
+        Measures the launch overhead of every allocation shape (nodes x ppn) of the experiment not
+        measured yet in this allocation, by running the null_dummy benchmark 'calibrationruns' times
+        on the nodes of an app with that shape. Disabled by default (calibrationruns: 0).
+        """
+        runs = int(self.global_opts.get('calibrationruns', 0))
+        if self.calibration is None or runs <= 0: return
+        timeout = float(self.global_opts.get('calibrationtimeout', 60.0))
+        system_header = self.global_opts.get('system_header', [])
+
+        shapes = {}
+        for app in self.apps:
+            if app.node_list:
+                shapes.setdefault(LaunchCalibration.shape(len(app.node_list), self.ppn), app.node_list)
+        todo = {shape: nodes for shape, nodes in shapes.items() if not self.calibration.has(shape)}
+        if todo:
+            wrappers = os.environ.get("CRAB_WRAPPERS_PATH", os.path.join(os.environ.get("CRAB_ROOT", "."), "wrappers"))
+            try:
+                mod_dummy, _ = load_module(os.path.join(wrappers, "null_dummy.py"))
+            except Exception as e:
+                self.log(f"[{self.name}] [WARN] Launch calibration skipped, cannot load the null_dummy wrapper: {e}")
+                return
+            dummy = mod_dummy.app(-1, False, "")
+
+        for shape, nodes in todo.items():
+            dummy.set_nodes(nodes)
+            samples, error = [], ""
+            with self.tracer.span("calibration", shape=shape, runs=runs):
+                for _ in range(runs):
+                    try:
+                        run_job(dummy, self.wlmanager, self.ppn, pre_commands=system_header)
+                        self.sessions.add(dummy.process.pid)
+                        dummy.process.communicate(timeout=timeout)
+                    except subprocess.TimeoutExpired:
+                        kill_group(dummy.process)
+                        dummy.process.communicate()
+                        error = f"timed out after {timeout:.1f}s"
+                        break
+                    except Exception as e:
+                        error = str(e) or type(e).__name__
+                        break
+                    if dummy.process.returncode != 0:
+                        error = f"rc {dummy.process.returncode}"
+                        break
+                    samples.append(time.time() - dummy.launch_time)
+            self.calibration.add(shape, samples, error)
+            if error:
+                self.log(f"[{self.name}] [WARN] Launch calibration of {shape} failed after {len(samples)} runs: {error}")
+            if samples:
+                s = self.calibration.summary(shape)
+                self.log(f"[{self.name}] Launch overhead {shape} (nodes x ppn): median {s['median']*1000:.1f} ms, "
+                         f"min {s['min']*1000:.1f} ms, max {s['max']*1000:.1f} ms over {s['runs']} runs")
+        self.metadata['launch_calibration'] = {shape: self.calibration.summary(shape) for shape in shapes}
+
+    def execute(self):
+        """Main execution loop (Setup -> Run -> Wait -> Converge). The caller tears the apps down afterwards."""
+        self.prepare()
+        while not self.finished():
+            self.run_once()
+
+    def prepare(self):
+        """
+        Reads the run parameters, builds the schedule of the apps and restores the progress saved
+        in the checkpoint. The runner then performs one run per run_once() call, until finished():
+        execute() chains them, the worker interleaves the runs of several experiments ('interleave').
+        """
+        self.log(f"[{self.name}] Execution started.")
+        
+        # Params
+        self.min_runs = int(self.global_opts.get('minruns', 10))
+        self.max_runs = int(self.global_opts.get('maxruns', 20))
+        self.timeout = float(self.global_opts.get('timeout', 1200.0))
+        self.converge_all = bool(self.global_opts.get('convergeall', False))
+        self.alpha = float(self.global_opts.get('alpha', 0.05))
+        self.beta = float(self.global_opts.get('beta', 0.05))
+        # Time-bounded apps get 'killsignal' first and are killed only after 'killgrace' seconds
+        self.kill_signal = parse_signal(self.global_opts.get('killsignal', 'SIGUSR1'))
+        self.kill_grace = float(self.global_opts.get('killgrace', 5.0))
+
+        # Recupera l'header dalle opzioni globali (dove l'Orchestrator lo ha messo)
+        # Default a lista vuota se non esiste
+        self.system_header = self.global_opts.get('system_header', [])
+
+        # Schedule Logic Preparation
+        self.dependency_map = {}
+        self.static_schedule = []
+        self.rel_durations = {}
+        
+        # Build Schedule
+        for i, app in enumerate(self.apps):
+            # Start
+            if app.start_string.startswith('s'):
+                self.dependency_map[i] = int(app.start_string[1:])
+            else:
+                self.static_schedule.append((i, 's', float(app.start_string)))
+            
+            # End
+            if app.config_end and app.config_end != 'f':
+                val = float(app.config_end)
+                if app.start_string.startswith('s'):
+                     self.rel_durations[i] = val
+                else:
+                    self.static_schedule.append((i, 'k', val))
+
+        # Apps starting at 0 whose wrapper supports it are released together by the start gate
+        self.gated = []
+        if self.gate:
+            self.gated = [aid for aid, action, when in self.static_schedule
+                          if action == 's' and when == 0 and getattr(self.apps[aid], 'supports_gate', False)]
+        self.gate_timeout = float(self.global_opts.get('gatetimeout', 300.0))
+        self.policy = str(self.global_opts.get('predictpolicy', 'log')).lower()
+        if self.policy not in ('log', 'abandon', 'deprioritize'):
+            self.log(f"[{self.name}] [WARN] Unknown predictpolicy '{self.policy}', only logging the predictions.")
+            self.policy = 'log'
+
+        self.runs = 0
+        self.elapsed = 0.0 # Time spent in the runs of this experiment only, for 'timeout'
+        self.converged = False
+
+        # Resume from the checkpoint, if this experiment was interrupted
+        progress = self.checkpoint.progress(self.name) if self.checkpoint else None
+        if progress and self.sink is None:
+            self.log(f"[{self.name}] [WARN] Results were not streamed to disk, restarting the experiment from scratch.")
+            progress = None
+        if self.sink:
+            # Drops the output of a run that was interrupted before being checkpointed
+            self.sink.restore(progress['sink'] if progress else {})
+        if progress:
+            self.runs = progress['runs']
+            self.elapsed = progress['elapsed']
+            self.converged = progress['converged']
+            self.deprioritized = progress.get('deprioritized', False)
+            for container, state in zip(self.data_containers, progress['containers']):
+                container.set_state(state)
+            # Keeps what the interrupted (or deferred) part of the experiment recorded
+            path = os.path.join(self.exp_dir, 'metadata.json')
+            if os.path.isfile(path):
+                with open(path) as f:
+                    for key, value in json.load(f).items():
+                        self.metadata.setdefault(key, value)
+            self.log(f"[{self.name}] Resuming after {self.runs} completed runs ({self.elapsed:.1f}s elapsed).")
+
+    def finished(self) -> bool:
+        """True once the experiment converged or hit 'maxruns', 'timeout' or the time budget."""
+        if self.runs >= self.max_runs or (self.runs >= self.min_runs and self.converged) or self.elapsed >= self.timeout:
+            return True
+        if self.budget:
+            capped = self.budget.max_runs(self.name, self.runs, self.max_runs)
+            if capped < self.max_runs:
+                self.log(f"[{self.name}] [BUDGET] maxruns capped to {capped} "
+                         f"({self.budget.remaining():.1f}s left, {self.budget.reserved():.1f}s reserved for pending experiments).")
+                self.max_runs = capped
+            if self.runs >= self.max_runs or not self.budget.allow_run(self.name, self.runs):
+                self.log(f"[{self.name}] [BUDGET] Stopping after {self.runs} runs: no time left for another run.")
+                self.stopped_by_budget = True
+                return True
+        return self._apply_policy()
+
+    def _affordable_runs(self) -> int:
+        """Runs the experiment can still reach: 'maxruns' (capped by the budget) and what fits in 'timeout'."""
+        affordable = self.max_runs
+        if self.runs:
+            per_run = self.elapsed / self.runs
+            affordable = min(affordable, self.runs + int(max(0.0, self.timeout - self.elapsed) // per_run))
+        return affordable
+
+    def _predict(self):
+        """Logs (and keeps in the metadata) how many runs the experiment needs to converge, after 'minruns'."""
+        self.predicted_runs = None
+        if self.runs < self.min_runs or self.converged: return
+        self.predicted_runs = predict_runs(self.data_containers, self.alpha, self.beta, self.converge_all, self.runs)
+        affordable = self._affordable_runs()
+        self.metadata.setdefault('prediction', []).append(
+            {'run': self.runs, 'predicted_runs': self.predicted_runs, 'affordable_runs': affordable})
+        if self.predicted_runs is None:
+            self.log(f"[{self.name}] Run {self.runs}: CI target not reached, no run-count estimate yet")
+        else:
+            self.log(f"[{self.name}] Run {self.runs}: CI target not reached, predicted {self.predicted_runs} runs "
+                     f"({self.predicted_runs - self.runs} more, {affordable} affordable)")
+
+    def _apply_policy(self) -> bool:
+        """
+        Acts on a prediction beyond the runs the experiment can afford, as 'predictpolicy' says: 'log' only,
+        'abandon' stops it for good, 'deprioritize' stops it until the other experiments are done (once).
+        Returns True if the experiment must stop now. The decision goes in the metadata.
+        """
+        if self.predicted_runs is None: return False
+        affordable = self._affordable_runs()
+        if self.predicted_runs <= affordable: return False
+        action = self.policy
+        # Deferring needs the runner kept by the worker or a checkpoint to resume from, and happens once
+        if action == 'deprioritize' and (self.deprioritized or not (self.keep_alive or (self.checkpoint and self.sink))):
+            action = 'log'
+        decision = {'run': self.runs, 'predicted_runs': self.predicted_runs, 'affordable_runs': affordable,
+                    'policy': self.policy, 'action': {'log': 'continued', 'abandon': 'abandoned',
+                                                      'deprioritize': 'deprioritized'}[action]}
+        if action == 'log':
+            # Recorded the first time only, the prediction of every run is in 'prediction'
+            if 'decision' not in self.metadata:
+                self.metadata['decision'] = decision
+                self.log(f"[{self.name}] [WARN] Predicted {self.predicted_runs} runs to converge, only "
+                         f"{affordable} affordable: continuing")
+            return False
+        self.metadata['decision'] = decision
+        if action == 'abandon':
+            self.abandoned = True
+            self.log(f"[{self.name}] [WARN] Predicted {self.predicted_runs} runs to converge, only {affordable} "
+                     f"affordable: abandoning after {self.runs} runs")
+        else:
+            self.deferred = self.deprioritized = True
+            self._save_progress()
+            self.log(f"[{self.name}] [WARN] Predicted {self.predicted_runs} runs to converge, only {affordable} "
+                     f"affordable: deferring after the other experiments")
+        return True
+
+    def _save_progress(self):
+        if self.checkpoint and self.sink:
+            with self.tracer.span("checkpoint", run=self.runs):
+                self.checkpoint.save_progress(self.name, {
+                    'runs': self.runs,
+                    'elapsed': self.elapsed,
+                    'converged': self.converged,
+                    'deprioritized': self.deprioritized,
+                    'containers': [c.get_state() for c in self.data_containers],
+                    'sink': self.sink.snapshot(),
+                })
+
+    def run_once(self):
+        """Performs one run: launches the apps as scheduled, waits for them, collects their data, checks the CI."""
+        self.log(f"[{self.name}] Run {self.runs+1}...")
+        run_start = time.time()
+        trace_run = self.tracer.now()
+        
+        # Reset ephemeral schedule for this run
+        sched = EventScheduler()
+        for app in self.apps:
+            app.stopped = False
+            app.launch_time = app.exit_time = app.release_time = None
+        curr_deps = self.dependency_map.copy()
+        running = set()
+        finished = set()
+        stopping = set() # Signalled, waiting for them to exit within the grace period
+
+        try:
+            # With a start gate every other timer counts from the release of the gated apps
+            offset = 0.0
+            if self.gated:
+                offset = self._open_gate(self.runs, self.gated, sched, self.system_header, self.gate_timeout)
+                running.update(self.gated)
+            for aid, action, when in self.static_schedule:
+                if not (action == 's' and aid in self.gated):
+                    sched.schedule(offset + when, aid, action)
+
+            # Inner Event Loop: sleeps until the next deadline or child exit
+            while sched.has_timers() or curr_deps or running:
+                if not sched.has_timers() and not running:
+                    self.log(f"[{self.name}] [WARN] Unresolvable start dependencies: {curr_deps}")
+                    break
+
+                due, exited = sched.wait()
+                woke = sched.elapsed()
+
+                # 1. Time-based events
+                for aid, action, deadline in due:
+                    if action == 's':
+                        if aid not in running:
+                            self._log_dispatch(self.runs, aid, "start", deadline, sched.elapsed() - deadline)
+                            self._launch(self.runs, aid, sched, self.system_header, lateness=sched.elapsed() - deadline)
+                            running.add(aid)
+                    elif action == 'k':
+                        if aid in running and aid not in stopping:
+                            if self.kill_grace > 0:
+                                self._log_dispatch(self.runs, aid, f"{self.kill_signal.name} to", deadline,
+                                                   sched.elapsed() - deadline)
+                                self.apps[aid].process.send_signal(self.kill_signal)
+                                self.tracer.instant(self.kill_signal.name, lane=aid + 1, cat='signal', run=self.runs + 1)
+                                stopping.add(aid)
+                                sched.schedule(sched.elapsed() + self.kill_grace, aid, 'K')
+                            else:
+                                self._log_dispatch(self.runs, aid, "kill", deadline, sched.elapsed() - deadline)
+                                self._kill(self.runs, aid, sched)
+                                running.remove(aid)
+                                finished.add(aid)
+                    elif action == 'K':
+                        if aid in running:
+                            self.log(f"[{self.name}] Run {self.runs+1}: [WARN] app {aid} still running {self.kill_grace:.1f}s "
+                                     f"after {self.kill_signal.name}, killing it.")
+                            self._kill(self.runs, aid, sched)
+                            running.remove(aid)
+                            finished.add(aid)
+
+                # 2. Child exits
+                for aid in exited:
+                    if aid not in running: continue
+                    self._collect_exit(self.runs, aid, sched, killed=aid in stopping)
+                    if aid in stopping:
+                        self.apps[aid].stopped = True
+                    sched.cancel(aid, 'k')
+                    sched.cancel(aid, 'K')
+                    running.remove(aid)
+                    finished.add(aid)
+
+                # 3. Check Dependencies
+                started_deps = []
+                for waiter, target in curr_deps.items():
+                    if target in finished:
+                        self._log_dispatch(self.runs, waiter, f"start after app {target}", woke, sched.elapsed() - woke)
+                        self.tracer.instant(f"app {target} -> start app {waiter}", cat='dependency', run=self.runs + 1)
+                        self._launch(self.runs, waiter, sched, self.system_header, lateness=sched.elapsed() - woke)
+                        running.add(waiter)
+                        if waiter in self.rel_durations:
+                            sched.schedule(sched.elapsed() + self.rel_durations[waiter], waiter, 'k')
+                        started_deps.append(waiter)
+                for s in started_deps: del curr_deps[s]
+        finally:
+            sched.close()
+
+        # Collect Data (apps stopped by 'killsignal' dumped their results before exiting)
+        for app in self.apps:
+            if app.collect_flag and hasattr(app, 'process') and (app.process.returncode == 0 or app.stopped):
+                try:
+                    with self.tracer.span("read_data", lane=app.id_num + 1, cat='parse', run=self.runs + 1):
+                        raw_data = app.read_data()
+                except Exception as e:
+                    if not app.stopped: raise
+                    self.log(f"[{self.name}] [WARN] No data from app {app.id_num} after {self.kill_signal.name} "
+                             f"(rc {app.process.returncode}): {e}")
+                    continue
+                if getattr(app, 'summary', ""):
+                    self.log(f"[{self.name}] Run {self.runs+1}: app {app.id_num}: {app.summary}")
+                # Sweeping wrappers return {msg_size: metrics}, the others the metrics of their only size
+                sizes = self.app_containers[app.id_num]
+                if not isinstance(raw_data, dict):
+                    raw_data = {next(iter(sizes)): raw_data}
+                for msg_size, containers in sizes.items():
+                    metrics = raw_data.get(msg_size, [])
+                    if app.id_num in self.overlap_targets:
+                        metrics = list(metrics) + self._overlap_labels(self.runs, app, metrics, msg_size)
+                    series_list = [np.asarray(metrics[i] if i < len(metrics) else [], dtype=c.dtype)
+                                   for i, c in enumerate(containers)]
+                    for container, series in zip(containers, series_list):
+                        container.add_samples(series)
+                    if self.sink:
+                        self.sink.write_run(app.id_num, len(containers[0].num_samples), containers, series_list)
+
+        self.runs += 1
+        run_time = time.time() - run_start
+        self.elapsed += run_time
+        if self.budget:
+            self.budget.record_run(self.name, run_time)
+        if self.runs >= self.min_runs:
+            with self.tracer.span("check_CI", run=self.runs):
+                self.converged = check_CI(self.data_containers, self.alpha, self.beta, self.converge_all, self.runs)
+        self._predict()
+        self._save_progress()
+        self.tracer.complete(f"run {self.runs}", trace_run, cat='run', converged=self.converged)
+
+    def _log_dispatch(self, run: int, aid: int, event: str, target: float, lateness: float):
+        """Logs when an event was due (seconds from run start) and how late it was dispatched."""
+        self.log(f"[{self.name}] Run {run+1}: {event} app {aid} @ {target:.3f}s (lateness {lateness*1000:.3f} ms)")
+
+    def _launch(self, run: int, aid: int, sched: EventScheduler, system_header: List[str], lateness: float):
+        """Starts an app and watches it; the time spent launching it is traced."""
+        start = self.tracer.now()
+        run_job(self.apps[aid], self.wlmanager, self.ppn, pre_commands=system_header)
+        self.apps[aid].trace_start = self.tracer.now()
+        self.tracer.complete("launch", start, self.apps[aid].trace_start, lane=aid + 1, cat='launch',
+                             run=run + 1, lateness_ms=lateness * 1000)
+        self.sessions.add(self.apps[aid].process.pid)
+        sched.watch(aid, self.apps[aid].process)
+
+    def _open_gate(self, run: int, gated: List[int], sched: EventScheduler, system_header: List[str],
+                   timeout: float) -> float:
+        """
+        Launches the gated apps and releases them together once all of them checked in at the start
+        gate (or died, or 'gatetimeout' expired). Returns the release time, in seconds from the run start.
+        """
+        for aid in gated:
+            self.apps[aid].gate_spec = self.gate.spec(aid)
+            self._log_dispatch(run, aid, "start (gated)", 0.0, sched.elapsed())
+            self._launch(run, aid, sched, system_header, lateness=sched.elapsed())
+        with self.tracer.span("start gate", cat='gate', run=run + 1):
+            result = self.gate.release({str(aid): self.apps[aid].process for aid in gated}, timeout)
+        for key in result['released']:
+            self.apps[int(key)].release_time = result['released_at']
+
+        skew = f"{result['skew'] * 1000:.3f} ms" if result['skew'] is not None else "n/a"
+        self.log(f"[{self.name}] Run {run+1}: start gate released apps {', '.join(result['released']) or 'none'} "
+                 f"after {result['wait']:.3f}s (skew {skew})")
+        if result['missing']:
+            self.log(f"[{self.name}] Run {run+1}: [WARN] apps {', '.join(result['missing'])} did not reach the start gate")
+        self.metadata.setdefault('start_gate', []).append({'run': run + 1, **result})
+        return sched.elapsed()
+
+    def _kill(self, run: int, aid: int, sched: EventScheduler):
+        """Kills an app and its process group (SIGKILL) and collects what it printed so far."""
+        self.tracer.instant("SIGKILL", lane=aid + 1, cat='signal', run=run + 1)
+        kill_group(self.apps[aid].process)
+        sched.drain(aid)
+        self._collect_exit(run, aid, sched, killed=True)
+
+    def _overlap_labels(self, run: int, app, metrics: List[Any], msg_size: int) -> List[np.ndarray]:
+        """
+        Labels every sample of 'app' with 1 if its iteration started while another app of the run was
+        alive (between its launch and exit, as seen by the engine), 0 otherwise: one series per other app.
+        Logs the mean of the first metric over the overlapped and the other samples.
+        """
+        ts_idx = [meta["name"] for meta in app.metadata].index('Timestamp')
+        ts = np.asarray(metrics[ts_idx] if ts_idx < len(metrics) else [], dtype=np.float64)
+        first = np.asarray(metrics[0] if metrics else [], dtype=np.float64)
+        labels = []
+        for other_id in self.overlap_targets[app.id_num]:
+            other = self.apps[other_id]
+            if other.launch_time is None:
+                overlap = np.zeros(ts.size, dtype=bool)
+            else:
+                # Gated apps only start running when the gate releases them
+                begin = other.release_time if other.release_time is not None else other.launch_time
+                end = other.exit_time if other.exit_time is not None else time.time()
+                overlap = (ts >= begin) & (ts <= end)
+            labels.append(overlap.astype(np.float32))
+            if ts.size and first.size == ts.size:
+                counts = f"overlapped app {other_id} in {overlap.sum()}/{ts.size} samples"
+                # The comparison needs samples on both sides
+                if overlap.any() and (~overlap).any():
+                    inside = first[overlap].mean()
+                    outside = first[~overlap].mean()
+                    counts += (f", {app.metadata[0]['name']} {inside:.3e} overlapped vs {outside:.3e} not "
+                               f"(x{inside / outside:.2f})")
+                self.log(f"[{self.name}] Run {run+1}: app {app.id_num} ({msg_size} B) {counts}")
+        return labels
+
+    def _correct_wall(self, run: int, aid: int, window: Dict[str, Any]) -> str:
+        """
+        Adds to the window of an app its wall time without the launch overhead calibrated for its shape
+        and warns (once per app) if the overhead is more than 'overheadwarn' of the wall time.
+        Returns the wall time(s) formatted for the log.
+        """
+        wall = window['wall']
+        if self.calibration is None:
+            return f"after {wall:.3f}s"
+        shape = LaunchCalibration.shape(len(self.apps[aid].node_list), self.ppn)
+        overhead = self.calibration.overhead(shape)
+        if overhead is None:
+            return f"after {wall:.3f}s"
+        window['launch_overhead'] = overhead
+        window['corrected_wall'] = max(0.0, wall - overhead)
+        max_fraction = float(self.global_opts.get('overheadwarn', 0.1))
+        if overhead > max_fraction * wall and aid not in self.overhead_warned:
+            self.overhead_warned.add(aid)
+            self.log(f"[{self.name}] Run {run+1}: [WARN] launch overhead of app {aid} ({shape}, {overhead*1000:.1f} ms) "
+                     f"is {overhead / wall:.0%} of its wall time ({wall:.3f}s)")
+        return f"after {wall:.3f}s ({window['corrected_wall']:.3f}s without launch overhead)"
+
+    def _collect_exit(self, run: int, aid: int, sched: EventScheduler, killed: bool = False):
+        """Retrieves the output drained from an exited app and logs it if it failed on its own."""
+        proc = self.apps[aid].process
+        app = self.apps[aid]
+        app.exit_time = time.time()
+        window = {'run': run + 1, 'app_id': aid, 'launch': app.launch_time, 'release': app.release_time,
+                  'exit': app.exit_time, 'wall': app.exit_time - app.launch_time}
+        wall_msg = self._correct_wall(run, aid, window)
+        self.metadata.setdefault('app_windows', []).append(window)
+        self.tracer.complete(f"app {aid}", app.trace_start, lane=aid + 1, cat='app',
+                             run=run + 1, rc=proc.returncode, killed=killed)
+        try:
+            out_bytes, out_lines, err_bytes, err_lines = sched.stats(aid)
+            self.log(f"[{self.name}] Run {run+1}: app {aid} exited (rc {proc.returncode}) {wall_msg}, "
+                     f"stdout {out_bytes} B / {out_lines} lines, stderr {err_bytes} B / {err_lines} lines")
+            out, err = sched.output(aid)
+            self.apps[aid].set_output(out, err)
+            
+            # --- INIZIO MODIFICA: Error Logging ---
+            if proc.returncode != 0 and not killed:
+                # Costruiamo il messaggio di errore
+                error_msg = (
+                    f"\n[CRAB ERROR] Experiment '{self.name}' - App {aid} failed!\n"
+                    f"Return Code: {proc.returncode}\n"
+                )
+                
+                # Decodifica STDERR (byte -> string) per sicurezza
+                if err:
+                    decoded_err = err.decode('utf-8', errors='replace') if isinstance(err, bytes) else err
+                    error_msg += f"--- STDERR ---\n{decoded_err}\n"
+                
+                # Decodifica STDOUT (spesso MPI stampa errori qui)
+                if out:
+                    decoded_out = out.decode('utf-8', errors='replace') if isinstance(out, bytes) else out
+                    error_msg += f"--- STDOUT TAIL ---\n{decoded_out[-2000:]}\n" # Ultimi 2000 caratteri
+                
+                error_msg += "------------------------------------------------\n"
+
+                # 1. Stampa su sys.stderr (finisce in slurm_error.log)
+                print(error_msg, file=sys.stderr, flush=True)
+                
+                # 2. Salva un file di log dedicato nella cartella dell'esperimento
+                try:
+                    log_path = os.path.join(self.exp_dir, f"error_app_{aid}.log")
+                    with open(log_path, "w") as f:
+                        f.write(error_msg)
+                except Exception as e:
+                    print(f"[CRAB WARNING] Could not write error log file: {e}", file=sys.stderr)
+            # --- FINE MODIFICA ---
+
+        except Exception as e:
+            self.log(f"[INTERNAL ERROR] Failed reading output for app {aid}: {e}")
+
+    def teardown(self):
+        """Ensures all processes are killed before next experiment."""
+        if self.gate:
+            self.gate.close()
+            self.gate = None
+        for app in self.apps:
+            if hasattr(app, 'process') and app.process:
+                # Also when the launcher already exited: its descendants may still be in the group
+                try:
+                    kill_group(app.process)
+                    app.process.wait(timeout=5)
+                except Exception: pass
+
+    def check_leaks(self, exclusive: bool = True):
+        """
+        Verifies that no process launched by the experiment (and, with Slurm, no job step) outlived
+        the teardown, killing the leftovers, and records them in the metadata of the experiment.
+        While other experiments share the allocation (exclusive=False) only the sessions of its own
+        apps are checked: the other processes of the worker and the job steps may belong to them.
+        """
+        timeout = float(self.global_opts.get('cleanuptimeout', 10.0))
+        with self.tracer.span("check_leaks", exclusive=exclusive):
+            leaks = wait_for_cleanup(self.sessions, self.wlmanager, timeout, exclusive)
+        self.metadata['cleanup'] = leaks
+        for p in leaks['processes']:
+            self.log(f"[{self.name}] [WARN] Leaked process {p['pid']} (session {p['sid']}) after teardown, "
+                     f"killed: {p['cmdline']}")
+        for step in leaks['steps']:
+            self.log(f"[{self.name}] [WARN] Leaked job step {step} still running after teardown")
+        if leaks['alive']:
+            self.log(f"[{self.name}] [WARN] Still alive {leaks['wait']:.1f}s after teardown: "
+                     f"{', '.join(map(str, leaks['alive']))}")
+
+    def wait_quiescence(self):
+        """
+        Waits until every node of the allocation is quiet (network traffic below 'quiescenetrate' bytes/s,
+        at most 'quiescerunnable' runnable tasks), for at most 'quiescemaxwait' seconds, so that the
+        next experiment does not start on the tail of this one. The settle time goes in the metadata.
+        Opt-in: the probe is an extra job step across the allocation after every experiment.
+        """
+        max_wait = float(self.global_opts.get('quiescemaxwait', 0))
+        if max_wait <= 0: return
+        max_rate = float(self.global_opts.get('quiescenetrate', 1e6))
+        max_runnable = int(self.global_opts.get('quiescerunnable', 1))
+
+        start = time.monotonic()
+        with self.tracer.span("quiescence"):
+            nodes, error = [], "no workload manager"
+            if self.wlmanager:
+                nodes, error = probe_nodes(self.wlmanager, self.node_list, max_rate, max_runnable, max_wait)
+            if error:
+                self.log(f"[{self.name}] [WARN] Quiescence probe on the nodes failed ({error}), probing this node only.")
+                nodes = [probe(max_rate, max_runnable, max_wait)]
+        settle = time.monotonic() - start
+
+        quiet = all(n['quiet'] for n in nodes)
+        self.metadata['quiescence'] = {'settle': round(settle, 3), 'quiet': quiet, 'nodes': nodes}
+        if quiet:
+            self.log(f"[{self.name}] Nodes quiet after {settle:.2f}s")
+        else:
+            busy = ', '.join(f"{n['host']} ({n['netrate']/1e6:.1f} MB/s, {n['runnable']} runnable)"
+                             for n in nodes if not n['quiet'])
+            self.log(f"[{self.name}] [WARN] Nodes still busy after {settle:.2f}s: {busy}")
+
+    def write_trace(self):
+        """Writes the event trace of the experiment to '<exp_dir>/trace.json', if tracing is enabled."""
+        self.tracer.write(os.path.join(self.exp_dir, 'trace.json'))
+
+    def write_metadata(self):
+        """Writes the metadata gathered while running the experiment to '<exp_dir>/metadata.json'."""
+        if not self.metadata: return
+        path = os.path.join(self.exp_dir, 'metadata.json')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.metadata, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def save_results(self):
+        """Persists data to disk."""
+        with self.tracer.span("save"):
+            if self.sink:
+                # Runs were already streamed to disk as they completed
+                self.sink.close()
+                self.log(f"[{self.name}] Data saved to {self.exp_dir}")
+            elif self.data_containers:
+                out_fmt = self.global_opts.get('outformat', 'csv')
+                prefix = os.path.join(self.exp_dir, 'data')
+                log_data(out_fmt, prefix, self.data_containers)
+                self.log(f"[{self.name}] Data saved to {self.exp_dir}")
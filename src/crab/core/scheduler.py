@@ -0,0 +1,205 @@
+import heapq
+import itertools
+import os
+import selectors
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cleanup import kill_group
+
+# Tick used to poll children that could not get a pidfd (non-Linux hosts or kernels < 5.3)
+FALLBACK_POLL_INTERVAL = 0.001
+READ_CHUNK = 1 << 16
+# How long the pipes of an exited child may stay open (held by leftover descendants) before they are closed
+EXIT_EOF_GRACE = 1.0
+
+
+class PipeBuffer:
+    """Growable buffer holding everything read so far from one child pipe."""
+    __slots__ = ('data', 'lines', 'eof')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.lines = 0
+        self.eof = False
+
+    def feed(self, chunk: bytes):
+        self.data += chunk
+        self.lines += chunk.count(b'\n')
+
+
+class EventScheduler:
+    """
+    Event-driven dispatcher for a single run of an experiment.
+
+    Timed actions are kept in a heap ordered by deadline (seconds from the start of the run),
+    while child exits are waited on through pidfds registered in a selector. The loop therefore
+    sleeps exactly until the next deadline or the next child exit, instead of polling.
+    The stdout/stderr pipes of every watched child are drained through the same selector while
+    it runs, so chatty applications never block on a full pipe.
+    """
+    def __init__(self):
+        self._timers = []
+        self._seq = itertools.count()
+        self._selector = selectors.DefaultSelector()
+        self._procs: Dict[Any, Any] = {}
+        self._pidfds: Dict[Any, int] = {}
+        self._exited = set()
+        self._exit_time: Dict[Any, float] = {}
+        self._streams: Dict[Any, List[PipeBuffer]] = {}
+        self.t0 = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.t0
+
+    def schedule(self, deadline: float, key: Any, action: str):
+        """Queues 'action' for 'key' at 'deadline' seconds from the start of the run."""
+        heapq.heappush(self._timers, (deadline, next(self._seq), key, action))
+
+    def has_timers(self) -> bool:
+        return bool(self._timers)
+
+    def cancel(self, key: Any, action: str):
+        """Drops the pending 'action' timers of 'key'."""
+        timers = [t for t in self._timers if not (t[2] == key and t[3] == action)]
+        if len(timers) != len(self._timers):
+            heapq.heapify(timers)
+            self._timers = timers
+
+    def watch(self, key: Any, proc):
+        """Starts draining the pipes of 'proc' and waiting on its exit, reported under 'key' by wait()."""
+        self._procs[key] = proc
+        self._streams[key] = [PipeBuffer(), PipeBuffer()]
+        for idx, pipe in enumerate((proc.stdout, proc.stderr)):
+            if pipe is None:
+                self._streams[key][idx].eof = True
+                continue
+            os.set_blocking(pipe.fileno(), False)
+            self._selector.register(pipe.fileno(), selectors.EVENT_READ, ('pipe', key, idx))
+        try:
+            fd = os.pidfd_open(proc.pid)
+        except (AttributeError, OSError):
+            return # Falls back to polling this child
+        self._pidfds[key] = fd
+        self._selector.register(fd, selectors.EVENT_READ, ('exit', key))
+
+    def _release_pidfd(self, key: Any):
+        fd = self._pidfds.pop(key, None)
+        if fd is not None:
+            self._selector.unregister(fd)
+            os.close(fd)
+
+    def _read(self, key: Any, idx: int, fd: int):
+        buf = self._streams[key][idx]
+        try:
+            chunk = os.read(fd, READ_CHUNK)
+        except BlockingIOError:
+            return
+        if chunk:
+            buf.feed(chunk)
+        else:
+            buf.eof = True
+            self._selector.unregister(fd)
+
+    def unwatch(self, key: Any):
+        """Stops watching 'key' without reading its remaining output."""
+        self._release_pidfd(key)
+        proc = self._procs.pop(key, None)
+        self._exited.discard(key)
+        self._exit_time.pop(key, None)
+        if proc is None: return
+        for idx, pipe in enumerate((proc.stdout, proc.stderr)):
+            if pipe is None: continue
+            if not self._streams[key][idx].eof:
+                self._selector.unregister(pipe.fileno())
+                self._streams[key][idx].eof = True
+            pipe.close()
+
+    def drain(self, key: Any):
+        """
+        Reaps the child of 'key' and reads its pipes up to EOF, or for at most EXIT_EOF_GRACE seconds
+        if a descendant outside its process group keeps them open. Used after a forced kill.
+        """
+        proc = self._procs.get(key)
+        if proc is None: return
+        self._release_pidfd(key)
+        proc.wait()
+        deadline = time.monotonic() + EXIT_EOF_GRACE
+        with selectors.DefaultSelector() as sel:
+            for idx, pipe in enumerate((proc.stdout, proc.stderr)):
+                if self._streams[key][idx].eof: continue
+                self._selector.unregister(pipe.fileno())
+                sel.register(pipe.fileno(), selectors.EVENT_READ, idx)
+            while sel.get_map() and time.monotonic() < deadline:
+                for sel_key, _ in sel.select(deadline - time.monotonic()):
+                    chunk = os.read(sel_key.fd, READ_CHUNK)
+                    if chunk:
+                        self._streams[key][sel_key.data].feed(chunk)
+                    else:
+                        self._streams[key][sel_key.data].eof = True
+                        sel.unregister(sel_key.fd)
+        for buf in self._streams[key]:
+            buf.eof = True
+        self.unwatch(key)
+
+    def output(self, key: Any) -> Tuple[bytes, bytes]:
+        """Returns (and releases) everything read from the stdout and stderr of 'key'."""
+        out, err = self._streams.pop(key)
+        return bytes(out.data), bytes(err.data)
+
+    def stats(self, key: Any) -> Tuple[int, int, int, int]:
+        """Returns (stdout bytes, stdout lines, stderr bytes, stderr lines) received so far from 'key'."""
+        out, err = self._streams[key]
+        return len(out.data), out.lines, len(err.data), err.lines
+
+    def wait(self) -> Tuple[List[Tuple[Any, str, float]], List[Any]]:
+        """
+        Blocks until the next timer deadline or child exit, draining pipes in the meantime.
+        Returns the due timers as (key, action, deadline) and the keys of the children that
+        exited and whose pipes reached EOF.
+        """
+        timeout: Optional[float] = None
+        if self._timers:
+            timeout = max(0.0, self._timers[0][0] - self.elapsed())
+        polled = self._procs.keys() - self._pidfds.keys() - self._exited
+        if polled:
+            timeout = FALLBACK_POLL_INTERVAL if timeout is None else min(timeout, FALLBACK_POLL_INTERVAL)
+        if self._exit_time:
+            grace_left = max(0.0, min(self._exit_time.values()) + EXIT_EOF_GRACE - self.elapsed())
+            timeout = grace_left if timeout is None else min(timeout, grace_left)
+
+        candidates = set(polled)
+        if self._selector.get_map():
+            for sel_key, _ in self._selector.select(timeout):
+                if sel_key.data[0] == 'pipe':
+                    self._read(sel_key.data[1], sel_key.data[2], sel_key.fd)
+                else:
+                    candidates.add(sel_key.data[1])
+        elif timeout:
+            time.sleep(timeout)
+
+        for key in candidates:
+            if self._procs[key].poll() is not None:
+                self._exited.add(key)
+                self._release_pidfd(key)
+                # The launcher is gone: whatever is left in its group would only hold the pipes open
+                kill_group(self._procs[key])
+                self._exit_time[key] = self.elapsed()
+
+        exited = [key for key in self._exited if all(buf.eof for buf in self._streams[key])
+                  or self.elapsed() - self._exit_time[key] >= EXIT_EOF_GRACE]
+        for key in exited:
+            self.unwatch(key)
+
+        due = []
+        now = self.elapsed()
+        while self._timers and self._timers[0][0] <= now:
+            deadline, _, key, action = heapq.heappop(self._timers)
+            due.append((key, action, deadline))
+
+        return due, exited
+
+    def close(self):
+        for key in list(self._procs):
+            self.unwatch(key)
+        self._selector.close()
@@ -0,0 +1,73 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# Lane (trace 'thread') of the engine itself; app <id> gets lane id + 1
+ENGINE_LANE = 0
+
+
+class Tracer:
+    """
+    Records the events of an experiment in the Chrome trace-event format, loadable in Perfetto
+    or chrome://tracing: complete events for spans (setup, launches, app lifetimes, parsing,
+    CI checks, save) and instant events (signals, kills, dependency-triggered starts).
+
+    Events are appended to an in-memory list, nothing is written before write() is called at the
+    end of the experiment. A disabled tracer records nothing.
+    """
+    def __init__(self, enabled: bool, name: str = ""):
+        self.enabled = enabled
+        self.name = name
+        self.events: List[Dict[str, Any]] = []
+        self.lanes: Dict[int, str] = {ENGINE_LANE: "engine"}
+        self.pid = os.getpid()
+        self.t0 = time.perf_counter()
+        self.epoch0 = time.time()
+
+    def now(self) -> float:
+        """Microseconds since the tracer was created (the trace time base)."""
+        return (time.perf_counter() - self.t0) * 1e6
+
+    def name_lane(self, lane: int, name: str):
+        if self.enabled:
+            self.lanes[lane] = name
+
+    def complete(self, name: str, start: float, end: Optional[float] = None, lane: int = ENGINE_LANE,
+                 cat: str = "engine", **args):
+        """Span from 'start' to 'end' (as returned by now(); 'end' defaults to now)."""
+        if not self.enabled: return
+        end = self.now() if end is None else end
+        self.events.append({'name': name, 'cat': cat, 'ph': 'X', 'ts': start, 'dur': max(0.0, end - start),
+                            'pid': self.pid, 'tid': lane, 'args': args})
+
+    def instant(self, name: str, lane: int = ENGINE_LANE, cat: str = "engine", **args):
+        if not self.enabled: return
+        self.events.append({'name': name, 'cat': cat, 'ph': 'i', 's': 't', 'ts': self.now(),
+                            'pid': self.pid, 'tid': lane, 'args': args})
+
+    @contextmanager
+    def span(self, name: str, lane: int = ENGINE_LANE, cat: str = "engine", **args):
+        if not self.enabled:
+            yield
+            return
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.complete(name, start, lane=lane, cat=cat, **args)
+
+    def write(self, path: str):
+        """Writes the trace to 'path' (JSON object format). Does nothing if disabled or empty."""
+        if not self.enabled or not self.events: return
+        meta = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': ENGINE_LANE, 'args': {'name': self.name}}]
+        meta += [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': lane, 'args': {'name': name}}
+                 for lane, name in self.lanes.items()]
+        meta += [{'name': 'thread_sort_index', 'ph': 'M', 'pid': self.pid, 'tid': lane, 'args': {'sort_index': lane}}
+                 for lane in self.lanes]
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'traceEvents': meta + self.events, 'displayTimeUnit': 'ms',
+                       'otherData': {'experiment': self.name, 'start_epoch': self.epoch0}}, f)
+        os.replace(tmp_path, path)
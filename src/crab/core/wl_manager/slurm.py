@@ -1,7 +1,10 @@
 import os
 import shlex
+import subprocess
 
 from typing import List, Optional # Aggiunto typing per chiarezza
+
+from crab.core.hostlist import compress_hostlist
 class wl_manager:
     # Generates a script that can be used to run all the benchmarks specified in the schedule.
     def write_script(self, runner_args, schedules, nams, name, splits, node_file, ppn):
@@ -19,7 +22,8 @@ class wl_manager:
     # executing "pre_commands" before cmd
     def run_job(self, node_list: List[str], ppn: int, cmd: str, pre_commands: Optional[List[str]] = None):
         num_nodes = len(node_list)
-        node_list_string = ','.join(node_list)
+        # Compressed form ('nid[001-128]') keeps the command line short on large allocations
+        node_list_string = compress_hostlist(node_list)
         node_list_arg = '--nodelist ' + node_list_string
 
         # --- LOGICA DEL WRAPPER ---
@@ -32,7 +36,9 @@ class wl_manager:
             
             # 2. Uniamo i comandi silenziati e il comando finale con '&&'
             #    Nota: cmd (l'app) NON viene silenziato, perché ci serve il suo output!
-            full_sequence = " && ".join(silenced_pre_commands + [cmd])
+            #    'exec' makes the app replace the shell, so signals forwarded by srun
+            #    (e.g. the engine's 'killsignal') reach it instead of killing bash
+            full_sequence = " && ".join(silenced_pre_commands + [f"exec {cmd}"])
             
             # 3. Escaping delle virgolette singole per sicurezza dentro bash -c '...'
             safe_sequence = full_sequence.replace("'", "'\\''")
@@ -55,3 +61,17 @@ class wl_manager:
 
         print("[DEBUG]: SLURM command is: " + slurm_string)
         return slurm_string
+
+    # Returns the steps of the current job that are still running (e.g. '1234.5'),
+    # used after an experiment to detect srun steps that outlived it.
+    # The batch/extern/interactive steps are not reported.
+    def active_steps(self) -> List[str]:
+        job_id = os.environ.get("SLURM_JOB_ID")
+        if not job_id:
+            return []
+        try:
+            out = subprocess.run(['squeue', '-h', '-s', '-j', job_id, '-o', '%i'],
+                                 capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            return []
+        return [step for step in out.split() if step.rsplit('.', 1)[-1].isdigit()]
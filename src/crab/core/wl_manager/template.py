@@ -7,5 +7,10 @@ class wl_manager:
     # on the nodes in 'node_list' with 'ppn' processes per node.
     def run_job(self, node_list, ppn, cmd):
         pass
+
+    # Optional: returns the ids of the job steps still running, checked after every
+    # experiment to report steps that outlived it.
+    def active_steps(self):
+        return []
         
 
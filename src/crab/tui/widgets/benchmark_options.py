@@ -84,7 +84,9 @@ class BenchmarkOptions(VerticalScroll):
             yield Label("Output Format:", classes="option-label")
             yield Select([
                 ("CSV", "csv"),
-                ("HDF5", "hdf")
+                ("HDF5", "hdf"),
+                ("Parquet", "parquet"),
+                ("Arrow", "arrow")
             ], value="csv", id="outformat", classes="option-input")
 
         with Container(classes="option-group"):
@@ -1,8 +1,51 @@
 import sys
 import os
+import numpy as np
 sys.path.append(os.environ["CRAB_ROOT"] + "/wrappers")
 from base import base,sizeof_fmt
 
+# Same syntax as parse_msg_sizes in benchmarks/blink/common.h:
+# "8,64,1024", "8:1048576" (powers of two) or "8:1048576:4" (custom factor)
+def parse_msg_sizes(spec):
+    sizes = []
+    for tok in spec.split(','):
+        bounds = [int(x) for x in tok.split(':')]
+        if len(bounds) == 1:
+            sizes.append(bounds[0])
+            continue
+        size, last = bounds[0], bounds[1]
+        factor = bounds[2] if len(bounds) > 2 else 2
+        if size < 1 or factor < 2:
+            raise ValueError("Invalid -msgsize range: " + tok)
+        while size <= last:
+            sizes.append(size)
+            size *= factor
+    return sizes
+
+# Layout of the -binout files written by benchmarks/blink/common.h (all little-endian):
+# per message size, a header followed by a rows x cols float64 matrix
+BINOUT_MAGIC = b"BLINKBIN"
+BINOUT_HEADER = np.dtype([('magic', 'S8'), ('msg_size', '<i8'), ('rows', '<i8'), ('cols', '<i8')])
+
+# Returns a dict: msg_size -> list of arrays (one per column), without per-sample Python work
+def read_binout(path):
+    raw = np.fromfile(path, dtype=np.uint8)
+    blocks = {}
+    offset = 0
+    while offset < raw.size:
+        header = np.frombuffer(raw, dtype=BINOUT_HEADER, count=1, offset=offset)[0]
+        if header['magic'] != BINOUT_MAGIC:
+            raise ValueError("Corrupted binary results file: " + path)
+        offset += BINOUT_HEADER.itemsize
+        rows, cols = int(header['rows']), int(header['cols'])
+        matrix = np.frombuffer(raw, dtype='<f8', count=rows * cols, offset=offset).reshape(rows, cols)
+        offset += rows * cols * 8
+        blocks[int(header['msg_size'])] = list(np.ascontiguousarray(matrix.T))
+    return blocks
+
+# Extra last column printed with -timestamps: CLOCK_REALTIME start of each iteration on the main rank
+TIMESTAMP_METRIC = {'name': 'Timestamp', 'unit': 's', 'conv': False}
+
 class microbench(base):
     metadata = [
         {'name': 'Avg-Duration'     , 'unit': 's', 'conv': True }, # Per ogni iterazione da la media tra tutti i Rank
@@ -12,6 +55,11 @@ class microbench(base):
         {'name': 'MainRank-Duration', 'unit': 's', 'conv': False}
     ]
 
+    def __init__(self, id_num, collect_flag, args):
+        super().__init__(id_num, collect_flag, args)
+        if "-timestamps" in args.split():
+            self.metadata = self.metadata + [TIMESTAMP_METRIC]
+
     def get_path(self, name):
         p = ""
         # sys = os.environ["CRAB_SYSTEM"]
@@ -21,19 +69,80 @@ class microbench(base):
         p += os.environ["CRAB_ROOT"] + "/benchmarks/blink/bin/" + name
         return p
 
+    # Message sizes measured by one launch (-msgsize accepts a list or a range)
+    def get_msg_sizes(self):
+        args_values = self.args.split()
+        if "-msgsize" not in args_values:
+            return []
+        return parse_msg_sizes(args_values[args_values.index('-msgsize') + 1])
+
+    # Binary results file in the experiment directory when the 'binaryresults' global option is
+    # enabled (the framework sets exp_dir and binary_results). None if the args already have a
+    # -binout: that file belongs to the user, it is neither read nor removed
+    def get_binout_path(self):
+        if "-binout" in self.args.split() or not getattr(self, 'binary_results', False):
+            return None
+        return os.path.join(self.exp_dir, "samples_app_" + str(self.id_num) + ".bin")
+
+    # The blink benchmarks can wait on the engine's start gate ('startgate'): the framework
+    # sets gate_spec ('<host>:<port>:<key>') on the apps it launches through the gate
+    supports_gate = True
+    gate_spec = None
+
+    def run_app(self):
+        cmd = super().run_app()
+        path = self.get_binout_path()
+        if cmd and path is not None:
+            if os.path.exists(path):
+                os.remove(path) # Samples of a run that failed before they were read
+            cmd += " -binout " + path
+        if cmd and self.gate_spec is not None:
+            cmd += " -gate " + self.gate_spec
+        return cmd
+
+    # The iterations summary ('Ran N iterations...', last line of stdout) is kept in self.summary,
+    # logged by the runner
     def read_data(self):
         out_string = self.stdout
+        lines = out_string.splitlines()
+        self.summary = lines[-1] if lines else ""
+        path = self.get_binout_path()
+        if path is not None and os.path.exists(path):
+            blocks = read_binout(path)
+            os.remove(path) # A later run that fails must not find these samples
+            if len(self.get_msg_sizes()) > 1:
+                return blocks
+            return next(iter(blocks.values()), [[] for _ in self.metadata])
+        if len(self.get_msg_sizes()) > 1:
+            return self.read_sweep_data(out_string)
         tmp_list = []
-        print(out_string.splitlines()[-1])
-        for line in out_string.splitlines()[2:-1]:
+        for line in lines[2:-1]:
             tmp_list += [[float(x) for x in line.split(',')]]
         data_list = [list(x) for x in zip(*tmp_list)]
         return data_list
 
+    # With a size sweep each block of results is tagged with 'MsgSize: <n>'.
+    # Returns a dict: msg_size -> list of lists (one per metric), as read_data for a single size
+    def read_sweep_data(self, out_string):
+        rows = {}
+        curr_rows = None
+        summaries = []
+        for line in out_string.splitlines():
+            if line.startswith("MsgSize:"):
+                curr_rows = rows.setdefault(int(line.split(':')[1]), [])
+            elif curr_rows is not None:
+                try:
+                    curr_rows.append([float(x) for x in line.split(',')])
+                except ValueError: # Info line, CSV header and iterations summary
+                    if line.startswith("Ran "): summaries.append(line)
+        self.summary = " ".join(summaries)
+        return {size: [list(x) for x in zip(*r)] for size, r in rows.items()}
+
     def get_bench_input(self):
-        if "-msgsize" not in self.args:
+        sizes = self.get_msg_sizes()
+        if not sizes:
             return ""
+        elif len(sizes) == 1:
+            return sizeof_fmt(sizes[0])
         else:
-            args_values = self.args.split(" ") 
-            size_bytes = args_values[args_values.index('-msgsize') + 1]
-            return sizeof_fmt(int(size_bytes))
+            return sizeof_fmt(min(sizes)) + "-" + sizeof_fmt(max(sizes))
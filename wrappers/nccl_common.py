@@ -3,6 +3,14 @@ import sys
 sys.path.append(os.environ["CRAB_ROOT"] + "/wrappers")
 from base import base,sizeof_fmt
 
+# Sizes as accepted by nccl-tests: bytes, optionally with a K, M or G suffix
+def parse_nccl_size(value):
+    units = {'K': 1024, 'M': 1024**2, 'G': 1024**3}
+    value = value.strip().upper()
+    if value and value[-1] in units:
+        return int(value[:-1]) * units[value[-1]]
+    return int(value)
+
 class ncclbase(base):  
     metadata = [
         {'name': 'time-oop' , 'unit': 'us'  , 'conv': True }, # Runtime (out-of-place)
@@ -13,24 +21,70 @@ class ncclbase(base):
         {'name': 'busbw-ip' , 'unit': 'GB/s', 'conv': False}  # Bus Bandwidth (in-place)
     ]
 
+    # Value of an nccl-tests option, given as '-b 8', '--minbytes 8' or '--minbytes=8'
+    def get_option(self, short, long, default):
+        args_values = self.args.split()
+        for i, a in enumerate(args_values):
+            if a in (short, long) and i + 1 < len(args_values):
+                return args_values[i + 1]
+            if a.startswith(long + '='):
+                return a.split('=', 1)[1]
+        return default
+
+    # Message sizes of the sweep, in the same order as the rows printed by nccl-tests
+    # (-b/-e bounds, -f multiplication factor or -i increment, same defaults as nccl-tests)
+    def get_msg_sizes(self):
+        size = parse_nccl_size(self.get_option('-b', '--minbytes', '32M'))
+        max_size = parse_nccl_size(self.get_option('-e', '--maxbytes', '32M'))
+        factor = int(self.get_option('-f', '--stepfactor', '1'))
+        step = parse_nccl_size(self.get_option('-i', '--stepbytes', '1M'))
+        sizes = []
+        while size <= max_size:
+            sizes.append(size)
+            if factor <= 1 and step <= 0: break
+            size = size * factor if factor > 1 else size + step
+        return sizes
+
     def read_data(self):  # return list (size num_metrics) of variable size lists
-        output = self.stdout
-        lines = output.split('\n')
-        for l in lines:
-            if l[0] != "#":
-                l = ' '.join(l.strip().split()) # Replace multiple whitespaces with one
-                fields = l.split(' ')
-                return [[float(fields[5])], [float(fields[6])], [float(fields[7])], [float(fields[9])], [float(fields[10])], [float(fields[11])]]
-
-        return [[0]*self.num_metrics]
-    
+        rows = []
+        for l in self.stdout.split('\n'):
+            fields = l.split()
+            # Result rows start with the size; comments, warnings and NCCL INFO lines are skipped
+            if not fields or not fields[0].isdigit():
+                continue
+            try:
+                rows.append((int(fields[0]), [float(fields[i]) for i in (5, 6, 7, 9, 10, 11)]))
+            except (ValueError, IndexError):
+                continue
+
+        sizes = self.get_msg_sizes()
+        if len(sizes) <= 1:
+            # Single size: one sample per metric
+            return [[v] for v in rows[0][1]] if rows else [[] for _ in self.metadata]
+
+        # Sweep: one sample per metric and size. nccl-tests rounds the requested size down to a
+        # whole number of elements, so a row belongs to the smallest requested size not below
+        # its printed size. Sizes without a row get no samples; the mismatches are reported in
+        # self.summary, logged by the runner
+        data = {size: [[] for _ in self.metadata] for size in sizes}
+        unmatched = []
+        for printed, values in rows:
+            size = next((s for s in sorted(sizes) if s >= printed), None)
+            if size is None or data[size][0]:
+                unmatched.append(printed)
+                continue
+            data[size] = [[v] for v in values]
+        missing = [size for size in sizes if not data[size][0]]
+        self.summary = ""
+        if unmatched or missing:
+            self.summary = (f"[WARN] nccl-tests rows not matching a requested size: {unmatched}, "
+                            f"sizes without results: {missing}")
+        return data
+
     def get_bench_input(self):
-        if "-b" not in self.args or "-e" not in self.args:
-            raise ValueError("No message size specified")
-        else:
-            args_values = self.args.split(" ") 
-            lower = sizeof_fmt(int(args_values[args_values.index('-b') + 1]))
-            upper = sizeof_fmt(int(args_values[args_values.index('-e') + 1]))
-            if(lower != upper):
-                raise ValueError("Benchmark was called with different lower and upper bounds (-b and -e)")
+        sizes = self.get_msg_sizes()
+        lower = sizeof_fmt(sizes[0])
+        upper = sizeof_fmt(sizes[-1])
+        if lower == upper:
             return lower
+        return lower + "-" + upper
@@ -5,6 +5,7 @@ from microbench_common import microbench
 
 class app(microbench):
     metadata = []
+    supports_gate = False # null_dummy.c does not parse -gate
     
     def get_binary_path(self):
         return self.get_path("null_dummy")